@@ -0,0 +1,154 @@
+#!/usr/bin/env python3
+# IR code table store.
+#
+# Button codes are kept one JSON object per line, e.g.
+#   {"button": "+", "code": "0xffa857"}
+# New buttons are appended, and a later line for the same button replaces the
+# earlier one. To convert an old str(dict) code file once:
+#   python3 -m IR.code_table config/ir_code_ff.txt config/ir_code_ff.jsonl
+
+import json
+import os
+import sys
+import time
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from IR.ir_helper import parse_ir_to_dict
+
+class IRCodeTable:
+    """
+    An in-memory table of IR codes loaded once from an append-only file and
+    reloaded when the file changes on disk.
+    """
+
+    def __init__(self, path, check_interval=1.0):
+        """
+        Load the table.
+
+        Args:
+            path (str): The code table file. It is created on the first `add` if missing.
+            check_interval (float): The fewest seconds between checks of the file's mtime.
+        """
+        self.path = path
+        self.check_interval = check_interval
+        self.last_check = 0.0
+        self.mtime = None
+        self.buttons = {}
+        self.code_index = {}
+        self.load()
+
+    def load(self):
+        """Read the whole file and rebuild the button table and reverse index."""
+        buttons = {}
+        code_index = {}
+        if os.path.exists(self.path):
+            self.mtime = os.stat(self.path).st_mtime_ns
+            with open(self.path, "r") as f:
+                for line_number, line in enumerate(f, 1):
+                    if not line.strip():
+                        continue
+                    try:
+                        entry = json.loads(line)
+                        record(buttons, code_index, entry["button"], int(entry["code"], 16))
+                    except (ValueError, KeyError, TypeError) as e:
+                        print(f"Skipping invalid line {line_number} in {self.path}: {e}")
+        else:
+            self.mtime = None
+
+        # Swap in whole dictionaries so readers on other threads never see a partial table
+        self.buttons = buttons
+        self.code_index = code_index
+
+    def reload_if_changed(self):
+        """
+        Reload the table if the file was modified since it was last read.
+        The mtime is checked at most once per `check_interval`.
+
+        Returns:
+            bool: True if the table was reloaded.
+        """
+        now = time.monotonic()
+        if now - self.last_check < self.check_interval:
+            return False
+        self.last_check = now
+        mtime = os.stat(self.path).st_mtime_ns if os.path.exists(self.path) else None
+        if mtime == self.mtime:
+            return False
+        self.load()
+        return True
+
+    def lookup(self, code):
+        """
+        Args:
+            code (int or str): The integer code or its hex string.
+
+        Returns:
+            str: The button name, or None if the code is unknown.
+        """
+        return self.code_index.get(code)
+
+    def add(self, button, code):
+        """
+        Assign a code to a button, appending it to the file.
+
+        Args:
+            button (str): The button name.
+            code (int): The IR code.
+        """
+        folder = os.path.dirname(self.path)
+        if folder:
+            os.makedirs(folder, exist_ok=True)
+        with open(self.path, "a") as f:
+            f.write(json.dumps({"button": button, "code": hex(code)}) + "\n")
+        buttons = dict(self.buttons)
+        code_index = dict(self.code_index)
+        record(buttons, code_index, button, code)
+        self.buttons = buttons
+        self.code_index = code_index
+        self.mtime = os.stat(self.path).st_mtime_ns  # Our own write is already in memory
+
+def record(buttons, code_index, button, code):
+    """
+    Assign a code to a button in the table and reverse index, dropping the
+    button's old code and any other button that had this code.
+    """
+    old_code = buttons.pop(button, None)
+    if old_code is not None:
+        code_index.pop(old_code, None)
+        code_index.pop(hex(old_code), None)
+    old_button = code_index.get(code)
+    if old_button is not None:
+        buttons.pop(old_button, None)
+    buttons[button] = code
+    code_index[code] = button
+    code_index[hex(code)] = button
+
+def import_legacy(legacy_path, table_path):
+    """
+    Convert a str(dict) code file written by the old remote_setup into a code table file.
+
+    Args:
+        legacy_path (str): The old code file.
+        table_path (str): The code table file to write.
+
+    Returns:
+        int: The number of buttons converted.
+    """
+    with open(legacy_path, "r") as f:
+        btn_dict = parse_ir_to_dict(f.read())
+    with open(table_path, "w") as f:
+        for button, codes in btn_dict.items():
+            hex_codes = [code for code in codes if code.startswith("0x")]
+            if not hex_codes:
+                print(f"Skipping button {button}: no hex code")
+                continue
+            f.write(json.dumps({"button": button, "code": hex(int(hex_codes[0], 16))}) + "\n")
+    return len(btn_dict)
+
+if __name__ == "__main__":
+    if len(sys.argv) != 3:
+        print("Usage: python3 -m IR.code_table <legacy ir_code file> <new code table file>")
+        sys.exit(1)
+    count = import_legacy(sys.argv[1], sys.argv[2])
+    print(f"Converted {count} buttons to {sys.argv[2]}.")
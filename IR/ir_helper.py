@@ -8,23 +8,59 @@
 # HW: Pi Model 3B  V1.2, IR kit: Rx sensor module HX1838, Tx = IR remote(s)
 
 import pigpio
+import time
+from array import array
 
-# IR Format Definitions
-header = {'NEC': [9000, 4500], 'Yamaha': [9067, 4393]}
+# IR Format Definitions, in microseconds
+header = {'NEC': [9000, 4500], 'Yamaha': [9067, 4393], 'Samsung': [4500, 4500]}
 stop = {'NEC': 40000, 'Yamaha': 39597}
-bit0 = {'NEC': [562.5, 562.5], 'Yamaha': [642, 1600]}
-bit1 = {'NEC': [562.5, 1687.5], 'Yamaha': [642, 470]}
+bit0 = {'NEC': [562.5, 562.5], 'Yamaha': [642, 1600], 'Samsung': [560, 560]}
+bit1 = {'NEC': [562.5, 1687.5], 'Yamaha': [642, 470], 'Samsung': [560, 1690]}
 repeat = {'NEC': [9000, 2250, 562.5], 'Yamaha': [9065, 2139]}
+data_len = {'NEC': 32, 'Yamaha': 32, 'Samsung': 32}
 tolerance = {'down': 0.9, 'up': 1.1, 'no': 1}
-ir_remote = 'NEC'
-ir_format = {
-    'header': header[ir_remote],
-    'bit0': bit0[ir_remote],
-    'bit1': bit1[ir_remote],
-    'stop': stop[ir_remote],
-    'repeat': repeat[ir_remote],
-    'data_len': 32
-}
+
+def build_protocol(name):
+    """
+    Build the decoding parameters of one pulse-distance protocol from its timings.
+
+    Args:
+        name (str): The protocol name, a key of the timing tables above.
+
+    Returns:
+        dict: The protocol's bit threshold and frame length.
+    """
+    zero = sum(bit0[name])
+    one = sum(bit1[name])
+    return {
+        'name': name,
+        'threshold': (zero + one) / 2,  # Mark plus space splits 0 from 1 halfway between them
+        'invert': one < zero,  # Protocols where a 1 is the shorter bit are decoded inverted
+        'data_len': data_len[name],
+        'mark': (bit0[name][0] + bit1[name][0]) / 2,
+    }
+
+def build_header_table(names):
+    """
+    Build the table used to classify a frame from its header mark and space.
+
+    Args:
+        names (list): The protocol names to accept.
+
+    Returns:
+        list: (mark, space, mark_min, mark_max, space_min, space_max, protocol, is_repeat) tuples.
+    """
+    table = []
+    for name in names:
+        protocol = build_protocol(name)
+        headers = [(header[name], False)]
+        if name in repeat:
+            headers.append((repeat[name], True))
+        for timing, is_repeat in headers:
+            mark, space = timing[0], timing[1]
+            table.append((mark, space, mark * tolerance['down'], mark * tolerance['up'],
+                          space * tolerance['down'], space * tolerance['up'], protocol, is_repeat))
+    return table
 
 # Load IR File
 def parse_ir_to_dict(ir_model_rd):
@@ -56,27 +92,10 @@ def parse_ir_to_dict(ir_model_rd):
             print(f"Exception: {e}")
     return btn_dict
 
-def find_key(btn_dict, value):
-    """
-    Find the key in the dictionary that corresponds to the given value.
-
-    Args:
-        btn_dict (dict): The dictionary mapping button names to IR codes.
-        value (str): The IR code to find.
-
-    Returns:
-        str: The button name corresponding to the given IR code, or None if not found.
-    """
-    index = 0
-    for x in btn_dict.values():
-        for y in x:
-            if y == value:
-                return list(btn_dict.keys())[index]
-        index += 1
-
 # Infrared Receiver Class
 class rx:
-    def __init__(self, pi, gpio, external_callback, track, log, config_folder="../config", timeout=5):
+    def __init__(self, pi, gpio, external_callback, track, log, config_folder="../config", timeout=5,
+                 repeat_callback=None, repeat_window=150, protocols=None):
         """
         Initialize the IR receiver.
 
@@ -84,10 +103,16 @@ class rx:
             pi (pigpio.pi): The pigpio instance.
             gpio (int): The GPIO pin number.
             external_callback (function): The callback function to handle received IR signals.
+                Its last argument is the frame's other valid reading, or None; see `read_alternate`.
             track (bool): Whether to track the signal.
             log (bool): Whether to log the signal.
             config_folder (str): Path to the configuration folder.
             timeout (int): The watchdog timeout in milliseconds.
+            repeat_callback (function): Called as repeat_callback(code, count, alternate) for each
+                repeat frame sent while a button is held, or None to ignore repeat frames.
+            repeat_window (int): Milliseconds after the last frame in which a repeat frame still
+                belongs to the same button press.
+            protocols (list): The protocol names to decode, or None for every known protocol.
         """
         self.pi = pi
         self.gpio = gpio
@@ -101,11 +126,30 @@ class rx:
         pi.set_pull_up_down(gpio, pigpio.PUD_OFF)
         pi.set_mode(gpio, pigpio.INPUT)
         self.cb = pi.callback(gpio, pigpio.EITHER_EDGE, self.rx_callback)
-        self.d1a = []
-        self.d2a = []
-        self.threshold01 = sum(ir_format['bit1']) * tolerance['down']
+        self.header_table = build_header_table(protocols or list(header))
+        self.max_bits = max(entry[6]['data_len'] for entry in self.header_table)
+        # Header marks outlast the watchdog, so a timeout this soon after the first edge is not the end of a frame
+        self.header_mark_max = max(entry[3] for entry in self.header_table)
+        # Mark and space duration of every bit, preallocated so decoding never allocates
+        self.d1a = array('I', [0]) * self.max_bits
+        self.d2a = array('I', [0]) * self.max_bits
+        self.protocol = None  # Protocol of the frame being received, or None if its header was not recognised
+        self.threshold = 0
         self.valid_code = False
+        self.ir_code = 0
+        self.bits = 0
         self.ir_hex = 0
+        self.unknown_frames = 0
+        self.candidates = []  # Every protocol whose header fits the frame being received
+        self.alternate_code = None  # The frame's valid reading under another candidate protocol
+        self.repeat_callback = repeat_callback
+        self.repeat_window = repeat_window * 1000
+        self.repeat_frame = False
+        self.last_code = None  # Last valid code, which repeat frames refer to
+        self.last_alternate = None
+        self.last_tick = 0
+        self.repeat_count = 0
+        self.last_edge_time = 0.0  # Monotonic time of the last edge of the latest frame
 
     def rx_callback(self, gpio, level, tick):
         """
@@ -120,47 +164,164 @@ class rx:
             if not self.rec_started:
                 self.rec_started = True
                 self.pi.set_watchdog(self.gpio, self.watchdog_timeout)
-                self.ir_decoded = ""
                 self.edges = 1
-                self.d1a = []
-                self.d2a = []
+                self.ir_code = 0
+                self.bits = 0
                 self.t1 = None
                 self.t2 = None
                 self.t3 = tick
+                self.protocol = None
+                self.repeat_frame = False
             else:
                 self.edges += 1
                 self.t1 = self.t2
                 self.t2 = self.t3
                 self.t3 = tick
-                if self.edges == 2:
-                    if pigpio.tickDiff(self.t2, self.t3) > ir_format['header'][1] * tolerance['down']:
-                        self.edges -= 1
-                if self.edges % 2 == 1 and self.edges > 1:
-                    d1 = pigpio.tickDiff(self.t1, self.t2)
-                    d2 = pigpio.tickDiff(self.t2, self.t3)
-                    val = "1" if (d1 + d2) > self.threshold01 else "0"
-                    self.d1a.append({d2, d1})
-                    self.d2a.append(int(val))
-                    self.ir_decoded += val
+                # Edges 1-3 bound the header mark and space; each bit is a mark
+                # and a space ending on the odd edges from 5 on
+                if self.edges > 4:
+                    if self.edges & 1:
+                        d1 = pigpio.tickDiff(self.t1, self.t2)
+                        d2 = pigpio.tickDiff(self.t2, self.t3)
+                        if self.bits < self.max_bits:
+                            self.d1a[self.bits] = d1
+                            self.d2a[self.bits] = d2
+                        self.ir_code = (self.ir_code << 1) | ((d1 + d2) > self.threshold)
+                        self.bits += 1
+                elif self.edges == 3:
+                    self.classify(pigpio.tickDiff(self.t1, self.t2), pigpio.tickDiff(self.t2, self.t3))
         else:
+            if self.edges == 1 and self.rec_started and pigpio.tickDiff(self.t3, tick) < self.header_mark_max:
+                return  # Still inside the header mark; the watchdog fires again if no edge follows
             if self.rec_started:
                 self.rec_started = False
                 self.pi.set_watchdog(self.gpio, 0)
-            if self.edges > 2 * ir_format['data_len']:
-                self.ir_hex = hex(int(self.ir_decoded, 2))
+                # Back-date to the last edge: the watchdog fires `timeout` ms after it
+                self.last_edge_time = time.monotonic() - pigpio.tickDiff(self.t3, tick) / 1000000.0
+            if self.protocol is None:
+                if self.edges > 2:
+                    self.unknown_frames += 1
+            elif self.repeat_frame:
+                self.handle_repeat()
+            elif self.bits >= self.protocol['data_len']:
+                if len(self.candidates) > 1:
+                    self.resolve_protocol()
+                if self.protocol['invert']:
+                    self.ir_code ^= (1 << self.bits) - 1
                 self.valid_code = self.validity_check()
-                self.callback(self.ir_decoded, self.ir_hex, self.ir_hex[2:4], self.valid_code, self.track, self.log, self.config_folder)
+                self.alternate_code = self.read_alternate() if len(self.candidates) > 1 else None
+                if not self.valid_code and self.alternate_code is not None:
+                    self.ir_code, self.alternate_code = self.alternate_code, None
+                    self.valid_code = True
+                if self.valid_code:
+                    self.last_code = self.ir_code
+                    self.last_alternate = self.alternate_code
+                    self.last_tick = self.t3
+                    self.repeat_count = 0
+                if self.log:
+                    # Strings are only needed for logging and learning new buttons
+                    self.ir_hex = hex(self.ir_code)
+                    self.callback(self.ir_code, self.ir_hex, self.ir_hex[2:4], self.valid_code, self.track, self.log, self.config_folder,
+                                  self.alternate_code)
+                else:
+                    self.callback(self.ir_code, None, None, self.valid_code, self.track, self.log, self.config_folder,
+                                  self.alternate_code)
+
+    def classify(self, mark, space):
+        """
+        Pick the protocol of the frame being received from its header, once per
+        frame. When several protocols' headers fit, the closest one wins for
+        now and `resolve_protocol` settles it once the frame is complete.
+
+        Args:
+            mark (int): The header mark in microseconds.
+            space (int): The header space in microseconds.
+        """
+        best_error = None
+        self.candidates = []
+        for header_mark, header_space, mark_min, mark_max, space_min, space_max, protocol, is_repeat in self.header_table:
+            if mark_min <= mark <= mark_max and space_min <= space <= space_max:
+                if not is_repeat:
+                    self.candidates.append(protocol)
+                error = abs(mark - header_mark) + abs(space - header_space)
+                if best_error is None or error < best_error:
+                    best_error = error
+                    self.protocol = protocol
+                    self.repeat_frame = is_repeat
+        if self.protocol is not None:
+            self.threshold = self.protocol['threshold']
+
+    def resolve_protocol(self):
+        """
+        Guess between protocols whose headers all fit the frame by the mean
+        mark of its bits (NEC and Yamaha headers are only about 100 us apart).
+        The marks differ by only 80 us, so the guess is not trusted on its own:
+        `read_alternate` also reads the frame as the other candidates. Runs
+        once per frame, and re-decodes the stored bits if the threshold changes.
+        """
+        count = min(self.bits, self.max_bits)
+        mean_mark = sum(self.d1a[:count]) / count
+        protocol = min(self.candidates, key=lambda candidate: abs(mean_mark - candidate['mark']))
+        if protocol['threshold'] != self.threshold:
+            self.ir_code = self.decode_bits(protocol, count)
+            self.threshold = protocol['threshold']
+        self.protocol = protocol
+
+    def decode_bits(self, protocol, count):
+        """Decode the stored bits of the frame with a protocol's threshold, before any inversion."""
+        code = 0
+        for i in range(count):
+            code = (code << 1) | ((self.d1a[i] + self.d2a[i]) > protocol['threshold'])
+        return code
+
+    def read_alternate(self):
+        """
+        Read a complete frame as each other protocol whose header fitted it.
+        NEC and Yamaha frames look alike but for inverted bits, and both
+        readings pass `validity_check`, so the caller keeps whichever one
+        names a known button.
+
+        Returns:
+            int: The first valid reading that differs from `ir_code`, or None.
+        """
+        count = min(self.bits, self.max_bits)
+        for protocol in self.candidates:
+            if protocol is self.protocol or self.bits != protocol['data_len']:
+                continue
+            code = self.decode_bits(protocol, count)
+            if protocol['invert']:
+                code ^= (1 << count) - 1
+            if code != self.ir_code and self.check_code(code):
+                return code
+        return None
+
+    def handle_repeat(self):
+        """
+        Deliver a repeat frame as a held event for the last valid code, unless
+        it came too long after the previous frame to belong to the same press.
+        """
+        if self.repeat_callback is None or self.last_code is None:
+            return
+        if pigpio.tickDiff(self.last_tick, self.t3) > self.repeat_window:
+            self.last_code = None
+            return
+        self.last_tick = self.t3
+        self.repeat_count += 1
+        self.repeat_callback(self.last_code, self.repeat_count, self.last_alternate)
 
     def validity_check(self):
         """
-        Check the validity of the received IR code.
+        Check the validity of the received IR code: it must have the full number
+        of bits, and its last byte must be the inverse of the command byte.
 
         Returns:
             bool: True if the IR code is valid, False otherwise.
         """
-        cond1 = len(self.ir_decoded) == ir_format['data_len']
-        hex_head = self.ir_hex[0:2]
-        cond2 = int(hex_head + self.ir_hex[4], 16) + int(hex_head + self.ir_hex[6], 16) == 15
-        cond3 = int(hex_head + self.ir_hex[5], 16) + int(hex_head + self.ir_hex[7], 16) == 15
-        valid = cond1 and cond2 and cond3
-        return valid
\ No newline at end of file
+        if self.bits != self.protocol['data_len']:
+            return False
+        return self.check_code(self.ir_code)
+
+    @staticmethod
+    def check_code(code):
+        """Whether the last byte of a code is the inverse of the command byte."""
+        return ((code >> 8) ^ code) & 0xFF == 0xFF
@@ -0,0 +1,91 @@
+import queue
+import threading
+import time
+
+class KeyDispatcher:
+    """
+    Runs IR key handling on its own worker thread.
+
+    The pigpio callback only puts an event on a bounded queue, so it returns
+    straight away and never misses edges while a slow command (a pattern
+    change or a notification) runs. Events that arrive while the queue is full
+    are dropped and counted rather than blocking the callback.
+    """
+
+    def __init__(self, handler, maxsize=16):
+        """
+        Start the worker thread.
+
+        Args:
+            handler (function): Called on the worker thread with the arguments of each event.
+            maxsize (int): The most events that can wait before new ones are dropped.
+        """
+        self.handler = handler
+        self.events = queue.Queue(maxsize)
+        self.submitted = 0
+        self.handled = 0
+        self.dropped = 0
+        self.errors = 0
+        self.max_depth = 0
+        self.latency_total = 0.0
+        self.latency_max = 0.0
+        self.thread = threading.Thread(target=self.run, daemon=True)
+        self.thread.start()
+
+    def submit(self, event_time, *args):
+        """
+        Queue an event without blocking.
+
+        Args:
+            event_time (float): The monotonic time of the IR edge that produced the event.
+            *args: Arguments for the handler.
+
+        Returns:
+            bool: False if the queue was full and the event was dropped.
+        """
+        try:
+            self.events.put_nowait((event_time, args))
+        except queue.Full:
+            self.dropped += 1
+            return False
+        self.submitted += 1
+        self.max_depth = max(self.max_depth, self.events.qsize())
+        return True
+
+    def run(self):
+        while True:
+            event_time, args = self.events.get()
+            if args is None:
+                return
+            try:
+                self.handler(*args)
+            except Exception as e:
+                self.errors += 1
+                print(f"Error handling IR key: {e}")
+            latency = time.monotonic() - event_time
+            self.handled += 1
+            self.latency_total += latency
+            self.latency_max = max(self.latency_max, latency)
+
+    def stop(self):
+        """Handle the events already queued, then stop the worker thread."""
+        self.events.put((None, None))
+        self.thread.join()
+
+    def get_stats(self):
+        """
+        Report queue usage and the time from the IR edge to the end of its action.
+
+        Returns:
+            dict: The dispatcher statistics.
+        """
+        mean = self.latency_total / self.handled if self.handled else 0.0
+        return {
+            "submitted": self.submitted,
+            "handled": self.handled,
+            "dropped": self.dropped,
+            "errors": self.errors,
+            "max_depth": self.max_depth,
+            "latency_mean_ms": round(mean * 1000, 2),
+            "latency_max_ms": round(self.latency_max * 1000, 2),
+        }
@@ -1,4 +1,7 @@
-import RPi.GPIO as GPIO
+try:
+    import RPi.GPIO as GPIO
+except (ImportError, RuntimeError):  # Not on a Pi; the receiver pin is set up through pigpio alone
+    GPIO = None
 import time
 import os
 import pigpio
@@ -7,110 +10,164 @@ import multiprocessing
 
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
 
-from IR.ir_helper import parse_ir_to_dict, find_key, rx
+from IR.ir_helper import rx
+from IR.code_table import IRCodeTable
+from IR.key_dispatcher import KeyDispatcher
 from Mobile_Notifications.pushsafer import PushsaferNotification
+from Mobile_Notifications.dispatcher import NotificationDispatcher
 from RGB_Strips.rgb_controller import RGBController
 
+# Button -> (action, argument). Actions are RGBController methods or "send_notification".
+# Numeric arguments are steps, scaled up while the button is held.
+DEFAULT_KEY_ACTIONS = {
+    '0': ('clear_strip', None),
+    '1': ('activate_static_color', None),
+    '2': ('activate_rainbow', None),
+    '3': ('activate_theater_chase', None),
+    '-': ('set_max_brightness', -15),
+    '+': ('set_max_brightness', 15),
+    '<': ('adjust_speed', 10),
+    '>': ('adjust_speed', -10),
+    'CH+': ('cycle_next_color', None),
+    'CH-': ('cycle_previous_color', None),
+    '>||': ('send_notification', "Play/Pause button was pressed."),
+}
+
+# Buttons that keep acting while held, speeding up the longer they are held
+HOLD_KEYS = {'-', '+', '<', '>'}
+HOLD_ACCELERATION_REPEATS = 3  # Repeat frames (about 108 ms each) per acceleration step
+HOLD_MAX_ACCELERATION = 4
+
 class IRRemote:
     """
     A class to represent an IR remote control.
     """
 
-    def __init__(self, pin, ir_code_file, private_key, controller):
+    def __init__(self, pin, ir_code_file, private_key, controller, key_actions=None, pi=None):
         """
         Initialize the IRRemote class.
 
         Args:
             pin (int): The GPIO pin number for the IR receiver.
-            ir_code_file (str): The file path to the IR code dictionary.
+            ir_code_file (str): The file path to the IR code table.
             private_key (str): The private key for Pushsafer notifications.
             controller (RGBController): The shared RGBController instance.
+            key_actions (dict): Button -> (action, argument) overrides for DEFAULT_KEY_ACTIONS.
+            pi (pigpio.pi): The pigpio instance to receive on, or None to connect to pigpiod.
+                Pass an IR.trace.ReplayPi to drive the remote from recorded traces off-device.
         """
         self.pin = pin
         self.ir_code_file = ir_code_file
         self.controller = controller  # Use the shared RGBController instance
-        GPIO.setmode(GPIO.BCM)  # Use BCM pin numbering
-        GPIO.setup(self.pin, GPIO.IN, pull_up_down=GPIO.PUD_DOWN)  # Set GPIO pin as input with pull-down resistor
-        self.ir_codes = self.load_ir_codes()
-        self.pi = pigpio.pi()
-        self.ir_receiver = rx(self.pi, self.pin, self.ir_rx_callback, track=False, log=False)
+        self.commands = self.build_commands(dict(DEFAULT_KEY_ACTIONS, **(key_actions or {})))
+        if GPIO is not None and pi is None:
+            GPIO.setmode(GPIO.BCM)  # Use BCM pin numbering
+            GPIO.setup(self.pin, GPIO.IN, pull_up_down=GPIO.PUD_DOWN)  # Set GPIO pin as input with pull-down resistor
+        self.code_table = IRCodeTable(ir_code_file)  # Loaded once, reloaded when the file changes
+        # Keys are handled on a worker thread so the pigpio callback returns immediately
+        self.dispatcher = KeyDispatcher(self.dispatch_key)
+        self.pi = pi if pi is not None else pigpio.pi()
+        self.ir_receiver = rx(self.pi, self.pin, self.ir_rx_callback, track=False, log=False,
+                              repeat_callback=self.ir_repeat_callback)
         self.notifier = PushsaferNotification(private_key)  # Replace with your actual private key
+        self.notifications = NotificationDispatcher(self.notifier)  # Sends without blocking key handling
 
-    def load_ir_codes(self):
+    def build_commands(self, key_actions):
         """
-        Load the IR codes from the specified file.
+        Resolve the key actions to functions once, so a button press is a single lookup.
+
+        Args:
+            key_actions (dict): Button -> (action, argument).
 
         Returns:
-            dict: A dictionary mapping button names to their IR codes.
+            dict: Button -> (function, argument).
         """
-        if not os.path.exists(self.ir_code_file):
-            print("IR code dictionary file not found.")
-            return {}
-        
-        with open(self.ir_code_file, "r") as f:
-            ir_model_rd = f.read()
-        return parse_ir_to_dict(ir_model_rd)
-
-    def ir_rx_callback(self, ir_decoded, ir_hex, model, valid, track, log, config_folder):
+        commands = {}
+        for key, (action, argument) in key_actions.items():
+            if action == "send_notification":
+                commands[key] = (self.send_button_notification, argument)
+            else:
+                commands[key] = (getattr(self.controller, action), argument)
+        return commands
+
+    def send_button_notification(self, message):
+        self.notifications.send(
+            message=message,
+            title="IR Remote Notification",
+            icon="1",
+            sound="2",
+            vibration="1",
+            picture=""
+        )
+
+    def ir_rx_callback(self, code, ir_hex, model, valid, track, log, config_folder, alternate=None):
         """
         Callback function to handle received IR signals.
 
         Args:
-            ir_decoded (str): Decoded IR signal.
-            ir_hex (str): Hexadecimal representation of the IR signal.
-            model (str): IR remote model.
+            code (int): Decoded IR signal.
+            ir_hex (str): Hexadecimal representation of the IR signal, or None when not logging.
+            model (str): IR remote model, or None when not logging.
             log (bool): Whether to log the signal.
             config_folder (str): Path to the configuration folder.
+            alternate (int): The frame read as another protocol that fits it, or None.
         """
         if valid:
-            key = find_key(self.ir_codes, ir_hex)
-            if key:
-                print(f"Button pressed: {key}")
-                self.handle_ir_command(key)
-            else:
-                print("Unknown IR code received.")
+            self.dispatcher.submit(self.ir_receiver.last_edge_time, code, 0, alternate)
 
-    def handle_ir_command(self, key):
+    def ir_repeat_callback(self, code, count, alternate=None):
+        """
+        Callback function to handle repeat frames sent while a button is held.
+
+        Args:
+            code (int): The IR code of the held button.
+            count (int): The number of repeat frames since the button was pressed.
+            alternate (int): The held button's code read as another protocol, or None.
+        """
+        self.dispatcher.submit(self.ir_receiver.last_edge_time, code, count, alternate)
+
+    def dispatch_key(self, code, repeat, alternate=None):
+        """
+        Dispatcher thread: look up a received code and run its command.
+
+        Args:
+            code (int): Decoded IR signal.
+            repeat (int): The number of repeat frames while the button is held, or 0 for a fresh press.
+            alternate (int): The same frame read as another protocol; used if `code` is not in the table.
+        """
+        self.code_table.reload_if_changed()
+        key = self.code_table.lookup(code)
+        if key is None and alternate is not None:
+            key = self.code_table.lookup(alternate)  # An NEC frame taken for Yamaha, or the reverse
+        if repeat:
+            if key in HOLD_KEYS:
+                self.handle_ir_command(key, repeat)
+        elif key:
+            print(f"Button pressed: {key}")
+            self.handle_ir_command(key)
+        else:
+            print("Unknown IR code received.")
+
+    def handle_ir_command(self, key, repeat=0):
         """
         Handle the IR command based on the button key.
 
         Args:
             key (str): The button key corresponding to the IR command.
+            repeat (int): The number of repeat frames received while the button is held,
+                or 0 for a fresh press. Brightness and speed steps grow with it.
         """
-        commands = {
-            '0': self.controller.clear_strip,
-            '1': lambda: self.controller.activate_static_color(),
-            '2': lambda: self.controller.activate_rainbow(),
-            '3': lambda: self.controller.activate_theater_chase(),
-            # '4': self.command_4,
-            # '5': self.command_5,
-            # '6': self.command_6,
-            # '7': self.command_7,
-            # '8': self.command_8,
-            # '9': self.command_9,
-            '-': lambda: self.controller.set_max_brightness(-15),
-            '+': lambda: self.controller.set_max_brightness(15),
-            '<': lambda: self.controller.adjust_speed(10),
-            '>': lambda: self.controller.adjust_speed(-10),
-            'CH+': lambda: self.controller.cycle_next_color(),
-            'CH-': lambda: self.controller.cycle_previous_color(),
-            # 'CH': self.command_channel,
-            # 'EQ': self.command_eq,
-            '>||': lambda: self.notifier.send_notification(
-                message="Play/Pause button was pressed.",
-                title="IR Remote Notification",
-                icon="1",
-                sound="2",
-                vibration="1",
-                picture=""
-            ),
-        }
-
-        command = commands.get(key)
-        if command:
-            command()
-        else:
+        command = self.commands.get(key)
+        if command is None:
             print(f"Unknown command for key: {key}")
+            return
+        function, argument = command
+        if argument is None:
+            function()
+        elif isinstance(argument, int):
+            function(argument * min(1 + repeat // HOLD_ACCELERATION_REPEATS, HOLD_MAX_ACCELERATION))
+        else:
+            function(argument)
 
     def read_ir_code(self):
         """
@@ -125,7 +182,7 @@ def main():
     Main function to create an IRRemote instance and start reading IR codes.
     """
     controller = RGBController()  # Create a shared RGBController instance
-    ir_remote = IRRemote(pin=17, ir_code_file="config/ir_code_ff.txt", private_key="your_private_key_here", controller=controller)
+    ir_remote = IRRemote(pin=17, ir_code_file="config/ir_code_ff.jsonl", private_key="your_private_key_here", controller=controller)
     ir_remote.read_ir_code()
 
 if __name__ == "__main__":
@@ -11,7 +11,8 @@ import sys
 import os
 import signal
 import pigpio
-from IR.ir_helper import parse_ir_to_dict, find_key, rx
+from IR.ir_helper import rx
+from IR.code_table import IRCodeTable
 
 # SDefine the GPIO pin for the IR receiver
 IR_PIN = 17 # Board=11, BCM=17
@@ -34,29 +35,29 @@ def main():
         pi.stop()
         sys.exit(0)
 
-    def ir_rx_callback(ir_decoded, ir_hex, model, valid, track, log, config_folder):
+    def ir_rx_callback(code, ir_hex, model, valid, track, log, config_folder, alternate=None):
         """
         Callback function to handle received IR signals.
         
         Args:
-            ir_decoded (str): Decoded IR signal.
+            code (int): Decoded IR signal.
             ir_hex (str): Hexadecimal representation of the IR signal.
             model (str): IR remote model.
             valid (bool): Whether the IR signal is valid.
             track (bool): Whether to track the signal.
             log (bool): Whether to log the signal.
             config_folder (str): Path to the configuration folder.
+            alternate (int): The frame read as another protocol that fits it, or None.
         """
         if valid:
-            filepath = os.path.join(config_folder, "ir_code_" + str(model) + ".txt")
-            if os.path.exists(filepath):
-                with open(filepath, "r") as f:
-                    ir_model_rd = f.read()
-                btn_dict = parse_ir_to_dict(ir_model_rd)
-            else:
-                btn_dict = {}
-            
-            key = find_key(btn_dict, ir_hex)
+            table = get_table(model)
+            key = table.lookup(code)
+            if key is None and alternate is not None:
+                alternate_table = get_table(hex(alternate)[2:4])
+                key = alternate_table.lookup(alternate)
+                if key:
+                    # Already learned under the other protocol's reading; keep using that one
+                    table, code = alternate_table, alternate
             if key:
                 print(f"Button '{key}' was already assigned to this IR code.")
                 reassign = input("Do you want to reassign it? (y/n): ").strip().lower()
@@ -65,15 +66,18 @@ def main():
                     return
             
             key = input("Enter the button name for the captured IR code: ").strip()
-            btn_dict[key] = {ir_decoded, ir_hex}
-            ir_dict[model] = btn_dict
-            
-            os.makedirs(config_folder, exist_ok=True)  # Ensure the directory exists
-            with open(filepath, "w") as f:
-                f.write(str(ir_dict[model]))
+            table.add(key, code)
             print(f"Button '{key}' saved successfully.")
         idle()
  
+    def get_table(model):
+        """Return the code table of a remote model, loading it once; learned buttons are appended to it."""
+        table = code_tables.get(model)
+        if table is None:
+            table = IRCodeTable(os.path.join(config_folder, "ir_code_" + str(model) + ".jsonl"))
+            code_tables[model] = table
+        return table
+
     def idle():
         """
         Print a message indicating that the system is waiting for an IR signal.
@@ -84,7 +88,7 @@ def main():
     config_folder = "./config/"
     track = True
     log = True
-    ir_dict = {}
+    code_tables = {}
     
     # Setup IR Receiver Callback
     pi = pigpio.pi()
@@ -1,8 +1,8 @@
 import RPi.GPIO as GPIO
 import time
-import os
 import pigpio
-from IR.ir_helper import parse_ir_to_dict, find_key, rx
+from IR.ir_helper import rx
+from IR.code_table import IRCodeTable
 
 class IRRemote:
     """
@@ -10,8 +10,8 @@ class IRRemote:
 
     Attributes:
         pin (int): The GPIO pin number for the IR receiver.
-        ir_code_file (str): The file path to the IR code dictionary.
-        ir_codes (dict): The dictionary of IR codes.
+        ir_code_file (str): The file path to the IR code table.
+        code_table (IRCodeTable): The IR codes, looked up by received code.
         pi (pigpio.pi): The pigpio instance.
         ir_receiver (rx): The IR receiver instance.
     """
@@ -22,49 +22,54 @@ class IRRemote:
 
         Args:
             pin (int): The GPIO pin number for the IR receiver.
-            ir_code_file (str): The file path to the IR code dictionary.
+            ir_code_file (str): The file path to the IR code table.
         """
         self.pin = pin
         self.ir_code_file = ir_code_file
         GPIO.setmode(GPIO.BCM)  # Use BCM pin numbering
         GPIO.setup(self.pin, GPIO.IN, pull_up_down=GPIO.PUD_DOWN)  # Set GPIO pin as input with pull-down resistor
-        self.ir_codes = self.load_ir_codes()
+        self.code_table = IRCodeTable(ir_code_file)  # Loaded once, reloaded when the file changes
         self.pi = pigpio.pi()
-        self.ir_receiver = rx(self.pi, self.pin, self.ir_rx_callback, track=False, log=False)
+        self.ir_receiver = rx(self.pi, self.pin, self.ir_rx_callback, track=False, log=False,
+                              repeat_callback=self.ir_repeat_callback)
 
-    def load_ir_codes(self):
-        """
-        Load the IR codes from the specified file.
-
-        Returns:
-            dict: A dictionary mapping button names to their IR codes.
-        """
-        if not os.path.exists(self.ir_code_file):
-            print("IR code dictionary file not found.")
-            return {}
-        
-        with open(self.ir_code_file, "r") as f:
-            ir_model_rd = f.read()
-        return parse_ir_to_dict(ir_model_rd)
-
-    def ir_rx_callback(self, ir_decoded, ir_hex, model, valid, track, log, config_folder):
+    def ir_rx_callback(self, code, ir_hex, model, valid, track, log, config_folder, alternate=None):
         """
         Callback function to handle received IR signals.
 
         Args:
-            ir_decoded (str): Decoded IR signal.
-            ir_hex (str): Hexadecimal representation of the IR signal.
-            model (str): IR remote model.
+            code (int): Decoded IR signal.
+            ir_hex (str): Hexadecimal representation of the IR signal, or None when not logging.
+            model (str): IR remote model, or None when not logging.
             valid (bool): Whether the IR signal is valid.
             track (bool): Whether to track the signal.
             log (bool): Whether to log the signal.
             config_folder (str): Path to the configuration folder.
+            alternate (int): The frame read as another protocol that fits it, or None.
         """
         if valid:
-            key = find_key(self.ir_codes, ir_hex)
+            self.code_table.reload_if_changed()
+            key = self.code_table.lookup(code)
+            if key is None and alternate is not None:
+                key = self.code_table.lookup(alternate)
             if key:
                 print(f"Button pressed: {key}")
 
+    def ir_repeat_callback(self, code, count, alternate=None):
+        """
+        Callback function to handle repeat frames sent while a button is held.
+
+        Args:
+            code (int): The IR code of the held button.
+            count (int): The number of repeat frames since the button was pressed.
+            alternate (int): The held button's code read as another protocol, or None.
+        """
+        key = self.code_table.lookup(code)
+        if key is None and alternate is not None:
+            key = self.code_table.lookup(alternate)
+        if key:
+            print(f"Button held: {key} ({count})")
+
     def read_ir_code(self):
         """
         Print a message indicating that the system is waiting for an IR signal and keep the script running.
@@ -77,7 +82,7 @@ def main():
     """
     Main function to create an IRRemote instance and start reading IR codes.
     """
-    ir_remote = IRRemote(pin=17, ir_code_file="config/ir_code_ff.txt")
+    ir_remote = IRRemote(pin=17, ir_code_file="config/ir_code_ff.jsonl")
     ir_remote.read_ir_code()
 
 if __name__ == "__main__":
@@ -0,0 +1,359 @@
+#!/usr/bin/env python3
+# Record and replay IR edge traces.
+#
+# A trace is the raw (gpio, level, tick) stream pigpio hands to rx_callback,
+# stored as a small header, the expected codes (labels) and then 6 bytes per
+# edge. Replaying a trace runs the real rx decoder without pigpiod, so it can
+# be tested and profiled on any machine:
+#
+#   python3 -m IR.trace record press.irt --seconds 10 --label 0xffa857
+#   python3 -m IR.trace synth nec.irt --codes 0xffa857 0xff629d --repeats 2
+#   python3 -m IR.trace replay nec.irt --jitter 50 --noise 0.01
+
+import argparse
+import json
+import os
+import random
+import struct
+import sys
+import time
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import pigpio
+from IR.ir_helper import rx, header, bit0, bit1, repeat, data_len
+
+TRACE_MAGIC = b"IRTR"
+TRACE_VERSION = 1
+TRACE_HEADER = struct.Struct("<4sHHI")  # Magic, version, label count, edge count
+TRACE_LABEL = struct.Struct("<I")
+TRACE_EDGE = struct.Struct("<BBI")  # gpio, level, tick
+TICK_MASK = 0xFFFFFFFF  # pigpio ticks are 32-bit microseconds and wrap
+
+def write_trace(path, edges, labels=()):
+    """
+    Save a trace.
+
+    Args:
+        path (str): The trace file to write.
+        edges (list): (gpio, level, tick) tuples in the order they were received.
+        labels (list): The codes the trace is expected to decode to, in order.
+    """
+    with open(path, "wb") as f:
+        f.write(TRACE_HEADER.pack(TRACE_MAGIC, TRACE_VERSION, len(labels), len(edges)))
+        for label in labels:
+            f.write(TRACE_LABEL.pack(label))
+        f.write(b"".join(TRACE_EDGE.pack(*edge) for edge in edges))
+
+def read_trace(path):
+    """
+    Load a trace.
+
+    Returns:
+        tuple: (list of (gpio, level, tick) edges, list of label codes).
+
+    Raises:
+        ValueError: If the file is not a trace this version can read.
+    """
+    with open(path, "rb") as f:
+        data = f.read()
+    magic, version, label_count, edge_count = TRACE_HEADER.unpack_from(data, 0)
+    if magic != TRACE_MAGIC or version != TRACE_VERSION:
+        raise ValueError(f"{path} is not a version {TRACE_VERSION} IR trace")
+    offset = TRACE_HEADER.size
+    labels = [TRACE_LABEL.unpack_from(data, offset + i * TRACE_LABEL.size)[0] for i in range(label_count)]
+    offset += label_count * TRACE_LABEL.size
+    edges = list(TRACE_EDGE.iter_unpack(data[offset:offset + edge_count * TRACE_EDGE.size]))
+    return edges, labels
+
+class TraceRecorder:
+    """
+    Records every edge on a GPIO through its own pigpio callback, alongside
+    (or instead of) an rx decoder on the same pin.
+    """
+
+    def __init__(self, pi, gpio):
+        self.edges = []
+        self.cb = pi.callback(gpio, pigpio.EITHER_EDGE, self.record)
+
+    def record(self, gpio, level, tick):
+        if level != pigpio.TIMEOUT:  # Watchdog timeouts are recreated on replay
+            self.edges.append((gpio, level, tick))
+
+    def stop(self):
+        self.cb.cancel()
+
+    def save(self, path, labels=()):
+        write_trace(path, self.edges, labels)
+
+class ReplayPi:
+    """
+    Stands in for pigpio.pi when replaying: it keeps the callback and
+    watchdog rx registers instead of talking to pigpiod.
+    """
+
+    connected = True
+
+    def __init__(self):
+        self.callbacks = {}
+        self.watchdogs = {}
+
+    def set_pull_up_down(self, gpio, pud):
+        pass
+
+    def set_mode(self, gpio, mode):
+        pass
+
+    def set_watchdog(self, gpio, timeout):
+        self.watchdogs[gpio] = timeout
+
+    def callback(self, gpio, edge, func):
+        self.callbacks[gpio] = func
+        return ReplayCallback(self, gpio)
+
+class ReplayCallback:
+    def __init__(self, pi, gpio):
+        self.pi = pi
+        self.gpio = gpio
+
+    def cancel(self):
+        self.pi.callbacks.pop(self.gpio, None)
+
+def synthesize_frame(code, protocol, tick, gpio=17):
+    """
+    Build the edges an ideal remote sends for one frame.
+
+    Args:
+        code (int): The code to send.
+        protocol (str): The protocol name, a key of the ir_helper timing tables.
+        tick (int): The tick of the first edge.
+        gpio (int): The GPIO the edges are reported on.
+
+    Returns:
+        tuple: (list of edges, tick of the last edge).
+    """
+    durations = list(header[protocol])
+    for i in range(data_len[protocol] - 1, -1, -1):
+        durations.extend(bit1[protocol] if (code >> i) & 1 else bit0[protocol])
+    durations.append(bit0[protocol][0])  # Stop mark
+    return synthesize_edges(durations, tick, gpio)
+
+def synthesize_repeat(protocol, tick, gpio=17):
+    """Build the edges of one repeat frame. Returns (list of edges, tick of the last edge)."""
+    durations = list(repeat[protocol][:2]) + [bit0[protocol][0]]
+    return synthesize_edges(durations, tick, gpio)
+
+def synthesize_edges(durations, tick, gpio):
+    # The receiver output is active low: a mark pulls the pin to 0
+    edges = [(gpio, 0, tick & TICK_MASK)]
+    for i, duration in enumerate(durations):
+        tick += int(duration)
+        edges.append((gpio, 1 if i % 2 == 0 else 0, tick & TICK_MASK))
+    return edges, tick
+
+def perturb(edges, jitter=0, noise=0.0, rng=None):
+    """
+    Add synthetic timing jitter and noise glitches to a trace.
+
+    Args:
+        edges (list): The edges to perturb.
+        jitter (int): Each edge moves by up to this many microseconds either way.
+        noise (float): The chance, per edge, of a short glitch pulse right after it.
+        rng (random.Random): The random source, for reproducible runs.
+
+    Returns:
+        list: The perturbed edges, still in tick order.
+    """
+    rng = rng or random.Random()
+    result = []
+    last = None
+    for gpio, level, tick in edges:
+        if jitter:
+            tick += rng.randint(-jitter, jitter)
+        if last is not None and pigpio.tickDiff(last, tick & TICK_MASK) > TICK_MASK // 2:
+            tick = last + 1  # Jitter must not reorder edges
+        tick &= TICK_MASK
+        result.append((gpio, level, tick))
+        last = tick
+        if noise and rng.random() < noise:
+            glitch = tick + rng.randint(5, 50)
+            result.append((gpio, level ^ 1, glitch & TICK_MASK))
+            result.append((gpio, level, (glitch + rng.randint(5, 50)) & TICK_MASK))
+            last = result[-1][2]
+    return result
+
+def count_matches(labels, decoded, window=4):
+    """
+    Count the decoded codes that line up with the labels in order. A decoded
+    code that matches none of the next `window` labels counts as spurious, and
+    labels skipped over count as missed.
+    """
+    index = 0
+    matched = 0
+    for code in decoded:
+        for i in range(index, min(index + window, len(labels))):
+            if labels[i] == code:
+                matched += 1
+                index = i + 1
+                break
+    return matched
+
+def replay(edges, labels=(), realtime=False, protocols=None):
+    """
+    Feed a trace through a fresh rx decoder. Watchdog timeouts are recreated
+    from the watchdog rx sets, as pigpiod would report them.
+
+    Args:
+        edges (list): (gpio, level, tick) edges.
+        labels (list): The expected codes, for the accuracy figures. Like a code table, they
+            also pick between the readings of a frame that fits more than one protocol.
+        realtime (bool): Deliver edges at their recorded spacing instead of as fast as possible.
+        protocols (list): The protocol names rx decodes, or None for all.
+
+    Returns:
+        dict: Decode counts, throughput, per-edge cost and accuracy.
+    """
+    if not edges:
+        raise ValueError("The trace has no edges")
+    gpio = edges[0][0]
+    pi = ReplayPi()
+    decoded = []
+    known = set(labels)
+    stats = {"calls": 0, "busy": 0.0, "invalid": 0, "repeats": 0}
+
+    def on_code(code, ir_hex, model, valid, track, log, config_folder, alternate=None):
+        if valid:
+            # Keep the reading the labels know, as IRRemote keeps the one in its code table
+            decoded.append(alternate if alternate in known and code not in known else code)
+        else:
+            stats["invalid"] += 1
+
+    def on_repeat(code, count, alternate=None):
+        stats["repeats"] += 1
+
+    receiver = rx(pi, gpio, on_code, track=False, log=False, repeat_callback=on_repeat, protocols=protocols)
+    callback = pi.callbacks[gpio]
+    first_tick = edges[0][2]
+
+    def deliver(level, tick):
+        if realtime:
+            due = start + pigpio.tickDiff(first_tick, tick) / 1000000.0
+            while time.perf_counter() < due:
+                pass  # Spin: sleep() is far too coarse for IR edge spacing
+        call_start = time.perf_counter()
+        callback(gpio, level, tick)
+        stats["busy"] += time.perf_counter() - call_start
+        stats["calls"] += 1
+
+    def fire_watchdog(last, tick):
+        # Like pigpiod, report a timeout every watchdog interval without an edge, while one is set
+        watchdog = pi.watchdogs.get(gpio, 0) * 1000
+        while watchdog and pigpio.tickDiff(last, tick) > watchdog:
+            last = (last + watchdog) & TICK_MASK
+            deliver(pigpio.TIMEOUT, last)
+            watchdog = pi.watchdogs.get(gpio, 0) * 1000
+
+    start = time.perf_counter()
+    last = None
+    for _, level, tick in edges:
+        if last is not None:
+            fire_watchdog(last, tick)
+        deliver(level, tick)
+        last = tick
+    fire_watchdog(last, (last + 1000000) & TICK_MASK)  # Let the last frame time out
+    elapsed = time.perf_counter() - start
+
+    report = {
+        "edges": len(edges),
+        "decoded": len(decoded),
+        "invalid": stats["invalid"],
+        "unknown_frames": receiver.unknown_frames,
+        "repeats": stats["repeats"],
+        "decodes_per_second": round(len(decoded) / elapsed, 1) if elapsed > 0 else 0.0,
+        "ns_per_edge": round(stats["busy"] * 1e9 / stats["calls"]),
+    }
+    if labels:
+        matched = count_matches(labels, decoded)
+        report["labels"] = len(labels)
+        report["matched"] = matched
+        report["spurious"] = len(decoded) - matched
+        report["accuracy"] = round(matched / len(labels), 4)
+    return report
+
+def main():
+    parser = argparse.ArgumentParser(description="Record, synthesize and replay IR edge traces.")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    record = commands.add_parser("record", help="record edges from the IR receiver through pigpiod")
+    record.add_argument("trace", help="trace file to write")
+    record.add_argument("--gpio", type=int, default=17, help="BCM pin of the IR receiver")
+    record.add_argument("--seconds", type=float, default=10.0, help="how long to record")
+    record.add_argument("--label", nargs="*", default=[], help="hex codes of the buttons pressed, in order")
+
+    synth = commands.add_parser("synth", help="write an ideal trace for a list of codes")
+    synth.add_argument("trace", help="trace file to write")
+    synth.add_argument("--codes", nargs="+", required=True, help="hex codes to send, in order")
+    synth.add_argument("--protocol", choices=sorted(header), default="NEC", help="protocol to send them with")
+    synth.add_argument("--repeats", type=int, default=0, help="repeat frames after each code")
+    synth.add_argument("--gpio", type=int, default=17, help="GPIO recorded in the trace")
+
+    play = commands.add_parser("replay", help="decode a trace and report speed and accuracy")
+    play.add_argument("trace", help="trace file to read")
+    play.add_argument("--realtime", action="store_true", help="replay at the recorded speed instead of flat out")
+    play.add_argument("--jitter", type=int, default=0, help="random timing jitter per edge in microseconds")
+    play.add_argument("--noise", type=float, default=0.0, help="chance per edge of a glitch pulse")
+    play.add_argument("--seed", type=int, help="random seed for jitter and noise")
+    play.add_argument("--loops", type=int, default=1, help="replay the trace this many times back to back")
+    play.add_argument("--protocols", nargs="+", choices=sorted(header), help="protocols to decode (default all)")
+    play.add_argument("-o", "--output", help="write the report to this JSON file")
+    args = parser.parse_args()
+
+    if args.command == "record":
+        pi = pigpio.pi()
+        if not pi.connected:
+            print("Failed to connect to pigpiod. Exiting.")
+            sys.exit(1)
+        pi.set_mode(args.gpio, pigpio.INPUT)
+        recorder = TraceRecorder(pi, args.gpio)
+        print(f"Recording GPIO {args.gpio} for {args.seconds} seconds...")
+        time.sleep(args.seconds)
+        recorder.stop()
+        pi.stop()
+        recorder.save(args.trace, [int(code, 16) for code in args.label])
+        print(f"Saved {len(recorder.edges)} edges to {args.trace}.")
+
+    elif args.command == "synth":
+        if args.repeats and args.protocol not in repeat:
+            parser.error(f"{args.protocol} has no repeat frame")
+        edges = []
+        tick = 0
+        labels = [int(code, 16) for code in args.codes]
+        for code in labels:
+            start = tick
+            frame, tick = synthesize_frame(code, args.protocol, start, args.gpio)
+            edges.extend(frame)
+            for i in range(1, args.repeats + 1):
+                frame, tick = synthesize_repeat(args.protocol, start + 108000 * i, args.gpio)  # Repeats follow every 108 ms
+                edges.extend(frame)
+            tick += 50000  # Gap before the next button press
+        write_trace(args.trace, edges, labels)
+        print(f"Saved {len(edges)} edges for {len(labels)} codes to {args.trace}.")
+
+    else:
+        edges, labels = read_trace(args.trace)
+        if args.loops > 1:
+            # Shift each copy past the end of the one before
+            span = pigpio.tickDiff(edges[0][2], edges[-1][2]) + 100000
+            edges = [(gpio, level, (tick + loop * span) & TICK_MASK) for loop in range(args.loops) for gpio, level, tick in edges]
+            labels = labels * args.loops
+        if args.jitter or args.noise:
+            edges = perturb(edges, args.jitter, args.noise, random.Random(args.seed))
+        report = replay(edges, labels, realtime=args.realtime, protocols=args.protocols)
+        print(json.dumps(report, indent=2))
+        if args.output:
+            with open(args.output, "w") as f:
+                json.dump(report, f, indent=2)
+            print(f"Report saved to {args.output}")
+
+if __name__ == "__main__":
+    main()
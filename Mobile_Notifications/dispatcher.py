@@ -0,0 +1,163 @@
+import queue
+import random
+import threading
+from Mobile_Notifications.pushsafer import NotificationError
+
+PENDING = "pending"
+SENT = "sent"
+FAILED = "failed"
+DROPPED = "dropped"  # The queue was full
+THROTTLED = "throttled"  # Too soon after the previous notification
+
+class NotificationHandle:
+    """
+    Tracks one notification queued on a NotificationDispatcher.
+    """
+
+    def __init__(self):
+        self.status = PENDING
+        self.attempts = 0
+        self.error = None
+        self.response = None  # (status, reason, body) once sent
+        self.finished = threading.Event()
+
+    def done(self):
+        """Whether the notification was sent or given up on."""
+        return self.finished.is_set()
+
+    def wait(self, timeout=None):
+        """
+        Wait for the notification to be sent or given up on.
+
+        Returns:
+            bool: False if the timeout passed first.
+        """
+        return self.finished.wait(timeout)
+
+    def finish(self, status, error=None, response=None):
+        self.status = status
+        self.error = error
+        self.response = response
+        self.finished.set()
+
+class NotificationDispatcher:
+    """
+    Sends notifications from a background thread so callers never wait on
+    the network.
+
+    Notifications wait in a bounded queue and are sent in order. A failed
+    request is retried with exponential backoff, and a notification that
+    arrives while the queue is full is dropped rather than blocking the
+    caller.
+    """
+
+    def __init__(self, notifier, maxsize=16, max_attempts=5, base_delay=1.0, max_delay=60.0):
+        """
+        Start the sending thread.
+
+        Args:
+            notifier (PushsaferNotification): Builds and delivers the requests.
+            maxsize (int): The most notifications that can wait before new ones are dropped.
+            max_attempts (int): Tries per notification before giving up.
+            base_delay (float): Seconds before the first retry; each retry waits twice as long.
+            max_delay (float): The longest wait between retries in seconds.
+        """
+        self.notifier = notifier
+        self.max_attempts = max_attempts
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.pending = queue.Queue(maxsize)
+        self.stopping = threading.Event()
+        self.sent = 0
+        self.failed = 0
+        self.dropped = 0
+        self.throttled = 0
+        self.retries = 0
+        self.thread = threading.Thread(target=self.run, daemon=True)
+        self.thread.start()
+
+    def send(self, message, title, icon="1", sound="0", vibration="0", picture=""):
+        """
+        Queue a notification and return immediately.
+
+        Args:
+            message (str): The message text to be sent.
+            title (str): The title of the message.
+            icon (str): The icon number (1-98).
+            sound (str): The sound number (0-28).
+            vibration (str): The vibration number (0-3).
+            picture (str): The picture data URL with Base64-encoded string.
+
+        Returns:
+            NotificationHandle: Reports when and how the notification was handled.
+        """
+        handle = NotificationHandle()
+        if self.notifier.throttled():
+            self.throttled += 1
+            handle.finish(THROTTLED)
+            return handle
+        payload = self.notifier.build_payload(message, title, icon, sound, vibration, picture)
+        try:
+            self.pending.put_nowait((handle, payload))
+        except queue.Full:
+            self.dropped += 1
+            handle.finish(DROPPED)
+        return handle
+
+    def run(self):
+        while True:
+            handle, payload = self.pending.get()
+            if handle is None:
+                return
+            self.deliver(handle, payload)
+
+    def deliver(self, handle, payload):
+        """Sending thread: post one notification, retrying with backoff."""
+        while True:
+            handle.attempts += 1
+            try:
+                response = self.notifier.deliver(payload)
+            except NotificationError as e:
+                if not e.retryable or handle.attempts >= self.max_attempts or self.stopping.is_set():
+                    self.failed += 1
+                    print(f"Notification failed after {handle.attempts} attempts: {e}")
+                    handle.finish(FAILED, error=e)
+                    return
+                self.retries += 1
+                delay = min(self.max_delay, self.base_delay * 2 ** (handle.attempts - 1))
+                # Jitter so retries after an outage don't all land together; stop() cuts the wait short
+                self.stopping.wait(delay * random.uniform(0.5, 1.0))
+            else:
+                self.sent += 1
+                handle.finish(SENT, response=response)
+                return
+
+    def stop(self, timeout=None):
+        """
+        Stop the sending thread. Queued notifications get one more try each and
+        retries stop.
+
+        Args:
+            timeout (float): The longest to wait in seconds, or None to wait for the queue to drain.
+        """
+        self.stopping.set()
+        try:
+            self.pending.put_nowait((None, None))
+        except queue.Full:
+            pass  # The thread is a daemon; it dies with the process
+        else:
+            self.thread.join(timeout)
+
+    def get_stats(self):
+        """
+        Returns:
+            dict: Counts of notifications sent, failed, dropped and throttled, and of retries.
+        """
+        return {
+            "queued": self.pending.qsize(),
+            "sent": self.sent,
+            "failed": self.failed,
+            "dropped": self.dropped,
+            "throttled": self.throttled,
+            "retries": self.retries,
+        }
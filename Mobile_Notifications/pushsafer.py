@@ -1,21 +1,234 @@
 import http.client
+import threading
 import urllib.parse
 import time
 
+# Errors from a kept-alive socket the server has already closed; the request is retried on a new connection
+STALE_CONNECTION_ERRORS = (http.client.RemoteDisconnected, http.client.BadStatusLine, ConnectionResetError, BrokenPipeError)
+
+class NotificationError(Exception):
+    """
+    Raised when a notification could not be delivered.
+
+    Attributes:
+    retryable (bool): Whether sending the same notification again may succeed.
+    """
+
+    def __init__(self, message, retryable=True):
+        super().__init__(message)
+        self.retryable = retryable
+
+class ConnectionPool:
+    """
+    Keeps a few keep-alive connections to one host open between requests, so
+    only the first request pays for the TCP and TLS handshakes.
+    """
+
+    def __init__(self, host, port, use_https=True, timeout=10.0, size=2, max_idle=60.0):
+        """
+        Parameters:
+        host (str): The host to connect to.
+        port (int): The port to connect to.
+        use_https (bool): Whether to connect with TLS.
+        timeout (float): Seconds to wait for the connection and each response.
+        size (int): The most idle connections kept open.
+        max_idle (float): Seconds after which an idle connection is closed instead of reused.
+        """
+        self.host = host
+        self.port = port
+        self.use_https = use_https
+        self.timeout = timeout
+        self.size = size
+        self.max_idle = max_idle
+        self.idle = []  # (connection, time it was returned), most recent last
+        self.lock = threading.Lock()
+        self.handshakes = 0
+        self.handshake_time = 0.0
+
+    def acquire(self, fresh=False):
+        """
+        Take an idle connection, or open a new one.
+
+        Parameters:
+        fresh (bool): Open a new connection even if idle ones are available.
+
+        Returns:
+        tuple: The connection, and whether it was reused.
+        """
+        now = time.monotonic()
+        with self.lock:
+            while self.idle and not fresh:
+                conn, released = self.idle.pop()
+                if now - released < self.max_idle:
+                    return conn, True
+                conn.close()
+        if self.use_https:
+            conn = http.client.HTTPSConnection(self.host, self.port, timeout=self.timeout)
+        else:
+            conn = http.client.HTTPConnection(self.host, self.port, timeout=self.timeout)
+        start = time.perf_counter()
+        conn.connect()  # Connect here so the handshake is timed apart from the request
+        self.handshakes += 1
+        self.handshake_time += time.perf_counter() - start
+        return conn, False
+
+    def release(self, conn):
+        """Return a connection for reuse, closing it if the pool is full."""
+        with self.lock:
+            if len(self.idle) < self.size:
+                self.idle.append((conn, time.monotonic()))
+                return
+        conn.close()
+
+    def close(self):
+        """Close every idle connection."""
+        with self.lock:
+            idle, self.idle = self.idle, []
+        for conn, _ in idle:
+            conn.close()
+
 class PushsaferNotification:
-    def __init__(self, private_key):
+    def __init__(self, private_key, host="pushsafer.com", port=443, use_https=True, timeout=10.0, min_interval=5, pool_size=2):
         """
         Initializes the PushsaferNotification class with the provided private key.
 
         Parameters:
         private_key (str): Your Pushsafer private or alias key.
+        host (str): The Pushsafer API host. Point it at a local server for testing.
+        port (int): The API port.
+        use_https (bool): Whether to connect with TLS.
+        timeout (float): Seconds to wait for the connection and the response.
+        min_interval (float): The fewest seconds between two notifications; closer ones are dropped.
+        pool_size (int): The most keep-alive connections kept open between notifications.
         """
         self.private_key = private_key
+        self.host = host
+        self.port = port
+        self.use_https = use_https
+        self.timeout = timeout
+        self.min_interval = min_interval
         self.last_notification_time = 0  # Initialize the last notification time
+        self.pool = ConnectionPool(host, port, use_https, timeout, pool_size)
+        self.requests = 0
+        self.reused = 0
+        self.stale_reconnects = 0
+        self.request_time = 0.0
+        self.request_time_max = 0.0
+
+    def build_payload(self, message, title, icon, sound, vibration, picture):
+        """
+        Encodes the notification parameters as the form body of an API request.
+
+        Returns:
+        str: The URL-encoded payload.
+        """
+        return urllib.parse.urlencode({
+            "k": self.private_key,         # Your Private or Alias Key
+            "m": message,                  # Message Text
+            "t": title,                    # Title of message
+            "i": icon,                     # Icon number 1-98
+            "s": sound,                    # Sound number 0-28
+            "v": vibration,                # Vibration number 0-3
+            "p": picture,                  # Picture Data URL with Base64-encoded string
+        })
+
+    def throttled(self):
+        """
+        Checks the rate limit, counting this call as a notification if it is allowed.
+
+        Returns:
+        bool: True if the last notification was less than `min_interval` seconds ago.
+        """
+        current_time = time.time()
+        if current_time - self.last_notification_time < self.min_interval:
+            return True
+        self.last_notification_time = current_time
+        return False
+
+    def deliver(self, payload):
+        """
+        Posts one payload to the API.
+
+        Parameters:
+        payload (str): A payload from `build_payload`.
+
+        Returns:
+        tuple: The HTTP status, reason and response body.
+
+        Raises:
+        NotificationError: If the request failed; retryable unless the server rejected it.
+        """
+        start = time.perf_counter()
+        try:
+            conn, reused = self.pool.acquire()
+            try:
+                response, data = self.post(conn, payload)
+            except STALE_CONNECTION_ERRORS:
+                if not reused:
+                    raise
+                # The server closed the idle connection; one retry on a fresh one
+                self.stale_reconnects += 1
+                conn, reused = self.pool.acquire(fresh=True)
+                response, data = self.post(conn, payload)
+        except (OSError, http.client.HTTPException) as e:
+            raise NotificationError(f"Pushsafer request failed: {e}") from e
+        elapsed = time.perf_counter() - start
+        self.requests += 1
+        self.reused += reused
+        self.request_time += elapsed
+        self.request_time_max = max(self.request_time_max, elapsed)
+        if response.status >= 500 or response.status == 429:
+            raise NotificationError(f"Pushsafer returned {response.status} {response.reason}")
+        if response.status >= 400:
+            raise NotificationError(f"Pushsafer rejected the notification: {response.status} {response.reason}", retryable=False)
+        return response.status, response.reason, data
+
+    def post(self, conn, payload):
+        """
+        Sends one request on a pooled connection and reads the whole response,
+        returning the connection to the pool if it can carry another.
+
+        Returns:
+        tuple: The response and its body.
+        """
+        try:
+            conn.request("POST", "/api", payload, { "Content-type": "application/x-www-form-urlencoded" })
+            response = conn.getresponse()
+            data = response.read()
+        except Exception:
+            conn.close()
+            raise
+        if response.will_close:
+            conn.close()
+        else:
+            self.pool.release(conn)
+        return response, data
+
+    def get_stats(self):
+        """
+        Reports connection reuse and request latency.
+
+        Returns:
+        dict: The connection statistics.
+        """
+        return {
+            "requests": self.requests,
+            "handshakes": self.pool.handshakes,
+            "handshake_ms_mean": round(self.pool.handshake_time * 1000 / self.pool.handshakes, 2) if self.pool.handshakes else 0.0,
+            "reuse_ratio": round(self.reused / self.requests, 3) if self.requests else 0.0,
+            "stale_reconnects": self.stale_reconnects,
+            "latency_ms_mean": round(self.request_time * 1000 / self.requests, 2) if self.requests else 0.0,
+            "latency_ms_max": round(self.request_time_max * 1000, 2),
+        }
+
+    def close(self):
+        """Closes the kept-alive connections."""
+        self.pool.close()
 
     def send_notification(self, message, title, icon, sound, vibration, picture):
         """
-        Sends a notification using the Pushsafer service.
+        Sends a notification using the Pushsafer service, waiting for the response.
+        Use a NotificationDispatcher to send without blocking.
 
         Parameters:
         message (str): The message text to be sent.
@@ -28,39 +241,17 @@ class PushsaferNotification:
         Returns:
         None
         """
-        current_time = time.time()
-        if current_time - self.last_notification_time >= 5:
-            # Establish a secure HTTPS connection to Pushsafer
-            conn = http.client.HTTPSConnection("pushsafer.com:443")
-            
-            # Prepare the payload with the notification parameters
-            payload = urllib.parse.urlencode({
-                "k": self.private_key,         # Your Private or Alias Key
-                "m": message,                  # Message Text
-                "t": title,                    # Title of message
-                "i": icon,                     # Icon number 1-98
-                "s": sound,                    # Sound number 0-28
-                "v": vibration,                # Vibration number 0-3
-                "p": picture,                  # Picture Data URL with Base64-encoded string
-            })
-            
-            # Send the POST request to the Pushsafer API
-            conn.request("POST", "/api", payload, { "Content-type": "application/x-www-form-urlencoded" })
-            
-            # Get the response from the server
-            response = conn.getresponse()
-            
-            # Print the status and reason of the response
-            print(response.status, response.reason)
-            
-            # Read and print the response data
-            data = response.read()
-            print(data)
-            
-            # Update the last notification time
-            self.last_notification_time = current_time
-        else:
+        if self.throttled():
             print("Notification not sent due to delay")
+            return
+        try:
+            status, reason, data = self.deliver(self.build_payload(message, title, icon, sound, vibration, picture))
+        except NotificationError as e:
+            print(e)
+            return
+        # Print the status and reason of the response, then the response data
+        print(status, reason)
+        print(data)
 
 # Example usage:
 if __name__ == "__main__":
@@ -72,4 +263,4 @@ if __name__ == "__main__":
         sound="10",                         # The sound number
         vibration="1",                      # The vibration number
         picture=""                          # The picture data URL (optional)
-    )
\ No newline at end of file
+    )
@@ -0,0 +1,99 @@
+import time
+
+class AnimationClock:
+    """
+    Paces pattern frames against absolute deadlines so render time does not
+    stretch the animation. When a frame misses its deadline the clock skips
+    ahead instead of slowing down, and counts the frames it dropped.
+    """
+
+    def __init__(self, frame_rate, jitter_smoothing=0.1):
+        """
+        Initialize the clock.
+
+        Args:
+            frame_rate (float): The target frames per second.
+            jitter_smoothing (float): Weight of each new sample in the jitter average (0-1).
+        """
+        self.frame_interval = 1.0 / frame_rate
+        self.jitter_smoothing = jitter_smoothing
+        self.start()
+
+    def start(self):
+        """Reset the deadlines and statistics, with the first frame due immediately."""
+        now = time.monotonic()
+        self.next_deadline = now
+        self.stats_start_time = now
+        self.frames = 0
+        self.dropped_frames = 0
+        self.jitter = 0.0
+
+    def set_frame_rate(self, frame_rate):
+        """
+        Change the target frame rate without restarting the animation.
+
+        Args:
+            frame_rate (float): The new target frames per second.
+        """
+        new_interval = 1.0 / frame_rate
+        # Keep the phase of the frame in progress and only re-time the next deadline
+        self.next_deadline += new_interval - self.frame_interval
+        self.frame_interval = new_interval
+
+    @property
+    def frame_rate(self):
+        return 1.0 / self.frame_interval
+
+    def remaining(self):
+        """
+        Returns:
+            float: Seconds until the next frame is due; zero or negative when it is already due.
+        """
+        return self.next_deadline - time.monotonic()
+
+    def tick(self):
+        """
+        Account for the frame that was just shown and schedule the next deadline.
+
+        Returns:
+            int: How many animation steps to advance. This is 1 when the frame
+                was on time, and more when deadlines were missed and frames dropped.
+        """
+        lateness = max(0.0, time.monotonic() - self.next_deadline)
+        missed = int(lateness / self.frame_interval)
+        self.dropped_frames += missed
+        self.next_deadline += (missed + 1) * self.frame_interval
+
+        deviation = lateness - missed * self.frame_interval
+        self.jitter += (deviation - self.jitter) * self.jitter_smoothing
+        self.frames += 1
+        return missed + 1
+
+    def wait(self):
+        """
+        Sleep until the next frame deadline, then account for it like `tick`.
+
+        Returns:
+            int: How many animation steps to advance.
+        """
+        remaining = self.remaining()
+        if remaining > 0:
+            time.sleep(remaining)
+        return self.tick()
+
+    def get_stats(self):
+        """
+        Report how well the clock is keeping up with its target rate.
+
+        Returns:
+            dict: Target and achieved FPS, average jitter in milliseconds,
+                and the number of frames shown and dropped since `start`.
+        """
+        elapsed = time.monotonic() - self.stats_start_time
+        return {
+            "target_fps": round(self.frame_rate, 2),
+            "fps": round(self.frames / elapsed, 2) if elapsed > 0 else 0.0,
+            "jitter_ms": round(self.jitter * 1000.0, 3),
+            "frames": self.frames,
+            "dropped_frames": self.dropped_frames,
+        }
@@ -0,0 +1,236 @@
+#!/usr/bin/env python3
+# Headless throughput benchmark for the LED patterns.
+#
+# Runs each pattern as fast as it can render and reports frames/sec, CPU time
+# per frame and allocations. Controller patterns also report the time spent
+# rendering a frame apart from the time spent pushing it to the strip. The
+# strip is a VirtualPixelStrip that makes the same Python calls per pixel as
+# rpi_ws281x.PixelStrip, and FrameBuffer.push writes it through a stand-in for
+# ws2811_led_set, so the push costs about what it does on a Pi, less the C
+# library and the DMA transfer. Results are saved as JSON so runs can
+# be compared to catch performance regressions:
+#
+#   python3 -m RGB_Strips.benchmark --output bench.json
+#   python3 -m RGB_Strips.benchmark --compare bench.json
+
+import argparse
+import contextlib
+import io
+import json
+import platform
+import time
+import tracemalloc
+import types
+from RGB_Strips import frame_buffer, lighting_test
+from RGB_Strips.pattern_cache import PatternCache
+from RGB_Strips.rgb_controller import RGBController
+from RGB_Strips.virtual_strip import VirtualPixelStrip
+
+DEFAULT_LED_COUNTS = [60, 300, 1000, 3000]
+
+def ws2811_led_set(leds, n, color):
+    """Stands in for the SWIG call rpi_ws281x makes for every pixel."""
+    if not isinstance(color, int):
+        raise TypeError(f"in method 'ws2811_led_set', argument 3 of type 'ws2811_led_t', got {type(color).__name__}")
+    if not 0 <= n < len(leds):
+        return -1
+    leds[n] = color
+    return 0
+
+# Stands in for the _rpi_ws281x module, so FrameBuffer.push takes its on-device path
+WS_COST_MODEL = types.SimpleNamespace(ws2811_led_set=ws2811_led_set)
+
+class PixelStripCostModel(VirtualPixelStrip):
+    """
+    A VirtualPixelStrip whose pixel writes take the same path as
+    rpi_ws281x.PixelStrip: setPixelColor assigns through __setitem__, which
+    makes one ws2811_led_set call per pixel, and `_channel` lets
+    FrameBuffer.push call ws2811_led_set directly.
+    """
+
+    def __init__(self, num, **kwargs):
+        super().__init__(num, **kwargs)
+        self._channel = self.pixels
+
+    def setPixelColor(self, n, color):
+        self[n] = color
+
+    def __setitem__(self, pos, value):
+        if isinstance(pos, slice):
+            for n in range(*pos.indices(len(self.pixels))):
+                ws2811_led_set(self.pixels, n, value)
+        else:
+            return ws2811_led_set(self.pixels, pos, value)
+
+def controller_pattern(name, led_count, cached=False):
+    """
+    Build a frame function that renders and pushes one controller pattern frame.
+
+    Returns:
+        tuple: (frame function taking the step, the strip it pushes to, and a
+            dict accumulating the seconds spent rendering and pushing).
+    """
+    with contextlib.redirect_stdout(io.StringIO()):  # Keep the controller's status messages out of the results
+        controller = RGBController(led_count=led_count, backend="virtual", pattern_cache=PatternCache() if cached else None)
+        controller.shutdown()  # Frames are driven from this thread instead of the render thread
+    controller.strip = PixelStripCostModel(led_count, capture_frames=0)  # Frame capture would dominate the allocation figures
+    controller.shown_pixels = None
+    frame_buffer.ws = WS_COST_MODEL
+    colors = controller.palette.colors
+    if name == "rainbow":
+        controller.start_pattern(controller.render_rainbow, 256)
+    elif name == "theater_chase":
+        controller.chase_color = colors[0]
+        controller.start_pattern(controller.render_theater_chase, 3, colors[0])
+
+    timings = {"render": 0.0, "push": 0.0}
+
+    def frame(step):
+        start = time.perf_counter()
+        if name == "color_wipe":
+            controller.frame.fill(colors[step % len(colors)])
+        else:
+            controller.pattern_renderer(step)
+        rendered = time.perf_counter()
+        controller.write_strip()
+        timings["render"] += rendered - start
+        timings["push"] += time.perf_counter() - rendered
+    return frame, controller.strip, timings
+
+def lighting_test_pattern(name, led_count):
+    """
+    Build a frame function that runs one lighting_test animation with no waits.
+    Each call runs a whole animation, which shows many frames. Rendering and
+    pushing are interleaved pixel by pixel, so they are not timed apart.
+    """
+    strip = PixelStripCostModel(led_count, capture_frames=0)
+    if name == "rainbowCycle":
+        return (lambda step: lighting_test.rainbowCycle(strip, wait_ms=0, iterations=1)), strip, None
+    return (lambda step: lighting_test.theaterChaseRainbow(strip, wait_ms=0)), strip, None
+
+PATTERNS = {
+    "rainbow": lambda n: controller_pattern("rainbow", n),
+    "rainbow_cached": lambda n: controller_pattern("rainbow", n, cached=True),
+    "theater_chase": lambda n: controller_pattern("theater_chase", n),
+    "theater_chase_cached": lambda n: controller_pattern("theater_chase", n, cached=True),
+    "color_wipe": lambda n: controller_pattern("color_wipe", n),
+    "rainbowCycle": lambda n: lighting_test_pattern("rainbowCycle", n),
+    "theaterChaseRainbow": lambda n: lighting_test_pattern("theaterChaseRainbow", n),
+}
+
+def run_pattern(name, led_count, min_frames, min_seconds):
+    """
+    Benchmark one pattern at one LED count.
+
+    Returns:
+        dict: The measurements for this run.
+    """
+    frame, strip, timings = PATTERNS[name](led_count)
+    frame(0)  # Warm up caches and precomputed rows outside the timed run
+    if timings is not None:
+        timings.update(render=0.0, push=0.0)
+
+    shows_before = strip.show_count
+    step = 1
+    wall_start = time.perf_counter()
+    cpu_start = time.process_time()
+    while strip.show_count - shows_before < min_frames or time.perf_counter() - wall_start < min_seconds:
+        frame(step)
+        step += 1
+    wall = time.perf_counter() - wall_start
+    cpu = time.process_time() - cpu_start
+    frames = strip.show_count - shows_before
+    if timings is not None:
+        render_ms = round(timings["render"] * 1000.0 / frames, 4)
+        push_ms = round(timings["push"] * 1000.0 / frames, 4)
+    else:
+        render_ms = push_ms = None
+
+    # Allocations are measured in a separate, shorter pass because tracing slows rendering down
+    tracemalloc.start()
+    shows_before = strip.show_count
+    traced_start, _ = tracemalloc.get_traced_memory()
+    for alloc_step in range(step, step + max(1, step // 10)):
+        frame(alloc_step)
+    traced_end, traced_peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    traced_frames = max(1, strip.show_count - shows_before)
+
+    return {
+        "pattern": name,
+        "led_count": led_count,
+        "frames": frames,
+        "fps": round(frames / wall, 2),
+        "cpu_ms_per_frame": round(cpu * 1000.0 / frames, 4),
+        "render_ms_per_frame": render_ms,
+        "push_ms_per_frame": push_ms,
+        "peak_alloc_bytes": traced_peak - traced_start,
+        "retained_bytes_per_frame": round((traced_end - traced_start) / traced_frames, 1),
+    }
+
+def compare_results(baseline, results, threshold):
+    """
+    Print every pattern whose frame rate dropped, or whose push time per frame
+    grew, by more than `threshold` percent.
+
+    Returns:
+        int: The number of regressions found.
+    """
+    previous = {(r["pattern"], r["led_count"]): r for r in baseline["results"]}
+    regressions = 0
+    for result in results:
+        old = previous.get((result["pattern"], result["led_count"]))
+        if old is None:
+            continue
+        if old["fps"]:
+            change = (result["fps"] - old["fps"]) / old["fps"] * 100.0
+            if change < -threshold:
+                regressions += 1
+                print(f"REGRESSION {result['pattern']} @ {result['led_count']} LEDs: {old['fps']} -> {result['fps']} fps ({change:+.1f}%)")
+        if old.get("push_ms_per_frame") and result["push_ms_per_frame"] is not None:
+            change = (result["push_ms_per_frame"] - old["push_ms_per_frame"]) / old["push_ms_per_frame"] * 100.0
+            if change > threshold:
+                regressions += 1
+                print(f"REGRESSION {result['pattern']} @ {result['led_count']} LEDs: push {old['push_ms_per_frame']} -> {result['push_ms_per_frame']} ms/frame ({change:+.1f}%)")
+    return regressions
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark LED pattern rendering throughput.")
+    parser.add_argument('-p', '--patterns', nargs='+', choices=sorted(PATTERNS), default=sorted(PATTERNS), help='patterns to run')
+    parser.add_argument('-n', '--led-counts', nargs='+', type=int, default=DEFAULT_LED_COUNTS, help='LED counts to run each pattern at')
+    parser.add_argument('--frames', type=int, default=200, help='minimum frames per run')
+    parser.add_argument('--seconds', type=float, default=0.5, help='minimum seconds per run')
+    parser.add_argument('-o', '--output', help='write results to this JSON file')
+    parser.add_argument('-c', '--compare', help='compare against a previous JSON results file')
+    parser.add_argument('--threshold', type=float, default=10.0, help='fps drop or push time increase, in percent, reported as a regression')
+    args = parser.parse_args()
+
+    results = []
+    for name in args.patterns:
+        for led_count in args.led_counts:
+            result = run_pattern(name, led_count, args.frames, args.seconds)
+            results.append(result)
+            if result["push_ms_per_frame"] is not None:
+                split = f"{result['render_ms_per_frame']:8.3f} render  {result['push_ms_per_frame']:8.3f} push"
+            else:
+                split = f"{'':8} render  {'':8} push"
+            print(f"{name:22} {led_count:6} LEDs  {result['fps']:10.1f} fps  {result['cpu_ms_per_frame']:8.3f} ms/frame  {split}  {result['peak_alloc_bytes']:9} B peak")
+
+    report = {
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "python": platform.python_version(),
+        "machine": platform.machine(),
+        "results": results,
+    }
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+        print(f"Results saved to {args.output}")
+    if args.compare:
+        with open(args.compare, "r") as f:
+            baseline = json.load(f)
+        if compare_results(baseline, results, args.threshold):
+            raise SystemExit(1)
+
+if __name__ == "__main__":
+    main()
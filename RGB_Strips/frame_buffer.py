@@ -0,0 +1,108 @@
+from array import array
+try:
+    import _rpi_ws281x as ws
+except ImportError:  # Not on a Pi; strips are written through setPixelColor
+    ws = None
+
+PUSH_BLOCK = 32  # Pixels compared at a time when only changed pixels are pushed
+
+def pixel_writer(strip):
+    """
+    Find the cheapest way to set one pixel of a strip.
+
+    Args:
+        strip (PixelStrip): The strip to write to.
+
+    Returns:
+        tuple: (function, target), where function(target, n, color) sets pixel n.
+    """
+    channel = getattr(strip, "_channel", None)
+    if ws is not None and channel is not None:
+        # The call PixelStrip.setPixelColor ends in, without its two Python frames per pixel
+        return ws.ws2811_led_set, channel
+    return type(strip).setPixelColor, strip
+
+class FrameBuffer:
+    """
+    A whole frame of packed 24-bit pixel colours, built in bulk and pushed
+    to the strip once per frame.
+    """
+
+    def __init__(self, num_pixels):
+        """
+        Initialize an all-off frame.
+
+        Args:
+            num_pixels (int): The number of pixels in the frame.
+        """
+        self.num_pixels = num_pixels
+        self.pixels = array('I', [0]) * num_pixels
+
+    def fill(self, color):
+        """
+        Set every pixel in the frame to the same colour.
+
+        Args:
+            color (int): The packed colour value.
+        """
+        self.pixels[:] = array('I', [color]) * self.num_pixels
+
+    def clear(self):
+        """Turn every pixel in the frame off."""
+        self.fill(0)
+
+    def fill_every(self, color, step, offset=0):
+        """
+        Set every `step`-th pixel, starting at `offset`, to the same colour.
+
+        Args:
+            color (int): The packed colour value.
+            step (int): The distance between lit pixels.
+            offset (int): The index of the first lit pixel.
+        """
+        count = len(range(offset, self.num_pixels, step))
+        self.pixels[offset::step] = array('I', [color]) * count
+
+    def blit(self, row, start=0):
+        """
+        Copy a window of a longer packed row into the frame.
+
+        Args:
+            row (array): Packed colours, at least `start + num_pixels` long.
+            start (int): The index in `row` of the frame's first pixel.
+        """
+        self.pixels[:] = row[start:start + self.num_pixels]
+
+    def load(self, source):
+        """
+        Copy a complete pre-rendered frame into the buffer.
+
+        Args:
+            source (array or memoryview): Exactly `num_pixels` packed colours.
+        """
+        memoryview(self.pixels)[:] = source
+
+    def push(self, strip, shown=None):
+        """
+        Write the frame to the strip and latch it.
+
+        Pixels are still set one call at a time (the driver has no bulk
+        setter), but straight through ws2811_led_set on a real strip, and
+        with `shown` only blocks of pixels that differ from it are written.
+
+        Args:
+            strip (PixelStrip): The strip to write to.
+            shown (array): The pixels the strip already holds, or None to write every pixel.
+        """
+        led_set, target = pixel_writer(strip)
+        pixels = self.pixels
+        if shown is None or len(shown) != self.num_pixels:
+            for n, color in enumerate(pixels):
+                led_set(target, n, color)
+        else:
+            for start in range(0, self.num_pixels, PUSH_BLOCK):
+                end = min(start + PUSH_BLOCK, self.num_pixels)
+                if pixels[start:end] != shown[start:end]:
+                    for n in range(start, end):
+                        led_set(target, n, pixels[n])
+        strip.show()
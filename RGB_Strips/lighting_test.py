@@ -6,7 +6,10 @@
 # various animations on a strip of NeoPixels.
 
 import time
-from rpi_ws281x import PixelStrip, Color
+try:
+    from rpi_ws281x import PixelStrip, Color
+except ImportError:  # Off-device: the animations can still drive a VirtualPixelStrip
+    from RGB_Strips.virtual_strip import VirtualPixelStrip as PixelStrip, Color
 import argparse
 
 # LED strip configuration:
@@ -0,0 +1,149 @@
+import zlib
+from array import array
+
+WHEEL_SIZE = 256
+
+# Default named colours, in the order the remote cycles through them
+NAMED_COLORS = [
+    ("White", (255, 255, 255)),
+    ("Red", (255, 0, 0)),
+    ("Green", (0, 255, 0)),
+    ("Blue", (0, 0, 255)),
+    ("Yellow", (255, 255, 0)),
+    ("Cyan", (0, 255, 255)),
+    ("Magenta", (255, 0, 255)),
+]
+
+def pack_color(red, green, blue):
+    """
+    Pack 8-bit channels into a 24-bit colour, the same layout as rpi_ws281x.Color.
+
+    Args:
+        red (int): Red channel (0-255).
+        green (int): Green channel (0-255).
+        blue (int): Blue channel (0-255).
+
+    Returns:
+        int: The packed colour value.
+    """
+    return (red << 16) | (green << 8) | blue
+
+def unpack_color(color):
+    """
+    Split a packed 24-bit colour back into its 8-bit channels.
+
+    Args:
+        color (int): The packed colour value.
+
+    Returns:
+        tuple: The (red, green, blue) channels.
+    """
+    return (color >> 16) & 255, (color >> 8) & 255, color & 255
+
+def wheel_channels(pos):
+    """
+    Generate rainbow colour channels across 0-255 positions.
+
+    Args:
+        pos (int): Position on the colour wheel (0-255).
+
+    Returns:
+        tuple: The (red, green, blue) channels at that position.
+    """
+    if pos < 85:
+        return pos * 3, 255 - pos * 3, 0
+    elif pos < 170:
+        pos -= 85
+        return 255 - pos * 3, 0, pos * 3
+    else:
+        pos -= 170
+        return 0, pos * 3, 255 - pos * 3
+
+class Palette:
+    """
+    Precomputed colour tables shared by every pattern: the 256-entry colour
+    wheel, the named colours, and per-channel gamma/brightness lookups.
+
+    The tables are rebuilt in place by `load`, so anything holding a reference
+    to them sees the new palette without reallocating.
+    """
+
+    def __init__(self, named_colors=NAMED_COLORS, gamma=None, brightness=255):
+        """
+        Initialize the palette tables.
+
+        Args:
+            named_colors (list): (name, (red, green, blue)) pairs.
+            gamma (float or tuple): Gamma exponent for all channels, or one per
+                channel as (red, green, blue). None disables gamma correction.
+            brightness (int): Scale applied on top of gamma (0-255).
+        """
+        self.red_table = bytearray(WHEEL_SIZE)
+        self.green_table = bytearray(WHEEL_SIZE)
+        self.blue_table = bytearray(WHEEL_SIZE)
+        self.wheel = array('I', [0]) * WHEEL_SIZE
+        self.colors = array('I')
+        self.names = []
+        self.version = 0
+        self.load(named_colors, gamma, brightness)
+
+    def load(self, named_colors=None, gamma=None, brightness=255):
+        """
+        Rebuild every table in place for a new palette.
+
+        Args:
+            named_colors (list): (name, (red, green, blue)) pairs, or None to
+                keep the current named colours.
+            gamma (float or tuple): Gamma exponent(s), or None for linear output.
+            brightness (int): Scale applied on top of gamma (0-255).
+        """
+        if named_colors is not None:
+            self.named_channels = [channels for _, channels in named_colors]
+            self.names[:] = [name for name, _ in named_colors]
+        if gamma is None or isinstance(gamma, (int, float)):
+            gamma = (gamma, gamma, gamma)
+        for table, channel_gamma in zip((self.red_table, self.green_table, self.blue_table), gamma):
+            table[:] = self.build_channel_table(channel_gamma, brightness)
+        self.wheel[:] = array('I', (self.correct(*wheel_channels(pos)) for pos in range(WHEEL_SIZE)))
+        self.colors[:] = array('I', (self.correct(*channels) for channels in self.named_channels))
+        self.version += 1  # Lets patterns notice that derived rows are stale
+        self.fingerprint = zlib.crc32(self.wheel.tobytes() + self.colors.tobytes())
+
+    @staticmethod
+    def build_channel_table(gamma, brightness):
+        """
+        Build a 256-entry lookup mapping a raw channel value to its output value.
+
+        Args:
+            gamma (float): Gamma exponent, or None for linear output.
+            brightness (int): Scale applied on top of gamma (0-255).
+
+        Returns:
+            bytes: The lookup table.
+        """
+        if gamma is None:
+            return bytes((i * brightness + 127) // 255 for i in range(WHEEL_SIZE))
+        return bytes(int((i / 255.0) ** gamma * brightness + 0.5) for i in range(WHEEL_SIZE))
+
+    def correct(self, red, green, blue):
+        """
+        Pack a colour after passing each channel through its lookup table.
+
+        Returns:
+            int: The corrected, packed colour value.
+        """
+        return pack_color(self.red_table[red], self.green_table[green], self.blue_table[blue])
+
+    def wheel_row(self, length):
+        """
+        Build a row of consecutive wheel colours long enough to window any
+        rainbow frame of `length` pixels out of it.
+
+        Args:
+            length (int): The number of pixels in a frame.
+
+        Returns:
+            array: `length + 256` packed colours.
+        """
+        repeats = length // WHEEL_SIZE + 2
+        return (self.wheel * repeats)[:length + WHEEL_SIZE]
@@ -0,0 +1,138 @@
+import mmap
+import os
+from array import array
+from collections import OrderedDict
+
+class CachedCycle:
+    """
+    One full period of a pattern, stored as consecutive packed frames.
+    """
+
+    def __init__(self, frames, period, num_pixels):
+        """
+        Args:
+            frames (array or memoryview): `period * num_pixels` packed colours.
+            period (int): The number of frames in one cycle.
+            num_pixels (int): The number of pixels in a frame.
+        """
+        self.frames = frames
+        self.period = period
+        self.num_pixels = num_pixels
+        self.nbytes = period * num_pixels * 4
+
+    def frame(self, step):
+        """
+        Returns:
+            array or memoryview: The packed pixels of the frame for an animation step.
+        """
+        start = (step % self.period) * self.num_pixels
+        return self.frames[start:start + self.num_pixels]
+
+class PatternCache:
+    """
+    Pre-rendered cycles of periodic patterns, evicted least recently used
+    first once they exceed a memory budget. Cycles can also be persisted to
+    memory-mapped files so they survive restarts.
+    """
+
+    def __init__(self, memory_budget=8 * 1024 * 1024, cache_dir=None):
+        """
+        Initialize the cache.
+
+        Args:
+            memory_budget (int): The most bytes of cycles to keep loaded.
+            cache_dir (str): Folder to persist cycles in, or None to keep them in memory only.
+        """
+        self.memory_budget = memory_budget
+        self.cache_dir = cache_dir
+        self.cycles = OrderedDict()
+        self.used_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        if cache_dir is not None:
+            os.makedirs(cache_dir, exist_ok=True)
+
+    def get_cycle(self, key, period, frame, renderer):
+        """
+        Look up a cycle, rendering it on a miss.
+
+        Args:
+            key (tuple): Identifies the pattern output; it must cover everything
+                the frames depend on, such as pattern, LED count, palette and colour.
+            period (int): The number of frames in one cycle.
+            frame (FrameBuffer): Scratch frame buffer to render into on a miss.
+            renderer (function): Draws the frame for an animation step into `frame`.
+
+        Returns:
+            CachedCycle: The cached cycle.
+        """
+        cycle = self.cycles.get(key)
+        if cycle is not None:
+            self.cycles.move_to_end(key)
+            self.hits += 1
+            return cycle
+
+        self.misses += 1
+        cycle = self.load_file(key, period, frame.num_pixels)
+        if cycle is None:
+            frames = array('I')
+            for step in range(period):
+                renderer(step)
+                frames.extend(frame.pixels)
+            cycle = CachedCycle(frames, period, frame.num_pixels)
+            if self.cache_dir is not None:
+                cycle = self.save_file(key, cycle)
+
+        self.cycles[key] = cycle
+        self.used_bytes += cycle.nbytes
+        self.evict()
+        return cycle
+
+    def evict(self):
+        """Drop least recently used cycles until the cache fits its budget, always keeping the newest."""
+        while self.used_bytes > self.memory_budget and len(self.cycles) > 1:
+            _, cycle = self.cycles.popitem(last=False)
+            self.used_bytes -= cycle.nbytes
+
+    def file_path(self, key):
+        name = "_".join(str(part) for part in key).replace(os.sep, "-")
+        return os.path.join(self.cache_dir, name + ".cycle")
+
+    def load_file(self, key, period, num_pixels):
+        """
+        Map a persisted cycle back into memory.
+
+        Returns:
+            CachedCycle: The cycle, or None if it was not persisted or has the wrong size.
+        """
+        if self.cache_dir is None:
+            return None
+        path = self.file_path(key)
+        if not os.path.exists(path) or os.path.getsize(path) != period * num_pixels * 4:
+            return None
+        with open(path, "rb") as f:
+            mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        return CachedCycle(memoryview(mapped).cast('I'), period, num_pixels)
+
+    def save_file(self, key, cycle):
+        """
+        Persist a freshly rendered cycle and return a memory-mapped view of it.
+
+        Returns:
+            CachedCycle: The persisted cycle.
+        """
+        path = self.file_path(key)
+        temp_path = path + ".tmp"
+        with open(temp_path, "wb") as f:
+            cycle.frames.tofile(f)
+        os.replace(temp_path, path)  # Readers never see a partially written file
+        return self.load_file(key, cycle.period, cycle.num_pixels)
+
+    def get_stats(self):
+        return {
+            "cycles": len(self.cycles),
+            "used_bytes": self.used_bytes,
+            "memory_budget": self.memory_budget,
+            "hits": self.hits,
+            "misses": self.misses,
+        }
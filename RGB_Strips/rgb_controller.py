@@ -1,61 +1,344 @@
-from rpi_ws281x import PixelStrip, Color
+try:
+    from rpi_ws281x import PixelStrip
+except ImportError:  # Not on a Pi; only the virtual backend is available
+    PixelStrip = None
+import os
 import time
+import queue
+from array import array
 import threading
+from RGB_Strips.frame_buffer import FrameBuffer
+from RGB_Strips.palette import Palette, pack_color, unpack_color
+from RGB_Strips.animation_clock import AnimationClock
+from RGB_Strips.transitions import Transition, check_transition
+from RGB_Strips.virtual_strip import VirtualPixelStrip
 
 class RGBController:
-    def __init__(self, led_count=60, led_pin=18, led_freq_hz=800000, led_dma=10, led_brightness=255, led_invert=False, led_channel=0):
-        self.strip = PixelStrip(led_count, led_pin, led_freq_hz, led_dma, led_invert, led_brightness, led_channel)
+    """
+    Drives an LED strip from a single long-lived render thread.
+
+    The render thread is the only code that touches the PixelStrip. Public
+    methods update the controller state on the caller's thread and queue the
+    hardware work, so they return immediately and a pattern switch takes
+    effect at the next frame boundary.
+    """
+
+    def __init__(self, led_count=60, led_pin=18, led_freq_hz=800000, led_dma=10, led_brightness=255, led_invert=False, led_channel=0, pattern_cache=None, backend=None):
+        # The strip backend is "ws281x" for real hardware or "virtual" to run without it
+        backend = backend or os.getenv("LED_BACKEND", "ws281x")
+        if backend == "virtual":
+            strip_class = VirtualPixelStrip
+        elif backend == "ws281x":
+            if PixelStrip is None:
+                raise RuntimeError("rpi_ws281x is not installed; set LED_BACKEND=virtual to run without LED hardware.")
+            strip_class = PixelStrip
+        else:
+            raise ValueError(f"Unknown LED backend: {backend}")
+        self.strip = strip_class(led_count, led_pin, led_freq_hz, led_dma, led_invert, led_brightness, led_channel)
         self.strip.begin()
+        self.backend = backend
+        self.led_pin = led_pin
+        self.frame = FrameBuffer(led_count)
+        self.palette = Palette()
         self.current_pattern = None
         self.max_brightness = led_brightness
         self.brightness = led_brightness
-        self.speed = 50
+        self.speed = 50  # Milliseconds per animation step
+        self.clock = AnimationClock(1000.0 / self.speed)
         self.current_color_index = 0
-        self.pattern_thread = None
         self.last_change_time = time.time()  # Track the last change time
+        self.change_listeners = []
+        self.pattern_cache = pattern_cache  # Optional PatternCache for periodic patterns
+
+        # State below is only touched by the render thread
+        self.pattern_renderer = None
+        self.pattern_step = 0
+        self.chase_color = 0
+        self.rainbow_row = None
+        self.rainbow_row_version = None
+        self.cycle_renderer = None
+        self.cycle_period = None
+        self.cycle_variant = 0
+        self.cycle = None
+        self.cycle_version = None
+        self.strip_brightness = led_brightness
+        self.solid_color = 0
+        self.brightness_fade = None
+        self.color_fade = None
+        self.shown_pixels = None
+        self.shown_brightness = None
+        self.hardware_writes = 0
+        self.skipped_writes = 0
+        self.render_errors = 0
+
+        self.commands = queue.Queue()
+        self.coalesced_commands = set()  # Coalesced commands queued but not yet run
+        self.coalesce_lock = threading.Lock()
+        self.coalesced_inputs = 0
+        self.render_thread = threading.Thread(target=self.render_loop, daemon=True)
+        self.render_thread.start()
         self.activate_static_color()
 
     def update_last_change_time(self):
-        """Update the last change time to the current time."""
+        """Update the last change time to the current time and notify listeners."""
         self.last_change_time = time.time()
+        for callback in self.change_listeners:
+            callback()
+
+    def add_change_listener(self, callback):
+        """
+        Register a function called with no arguments whenever the lighting changes.
+
+        Args:
+            callback (function): The function to call.
+        """
+        self.change_listeners.append(callback)
+
+    def post(self, command, *args):
+        """
+        Queue a command to run on the render thread before its next frame.
+
+        Args:
+            command (function): The function to call on the render thread.
+            *args: Arguments for the command.
+        """
+        self.commands.put((command, args))
+
+    def post_coalesced(self, command):
+        """
+        Queue a command unless it is already waiting to run. The command reads
+        the latest controller state when it runs, so a burst of updates made
+        before the render thread gets to it costs one run and one strip write.
+
+        Args:
+            command (function): The function to call on the render thread, with no arguments.
+        """
+        with self.coalesce_lock:
+            if command in self.coalesced_commands:
+                self.coalesced_inputs += 1
+                return
+            self.coalesced_commands.add(command)
+        self.post(self.run_coalesced, command)
+
+    def run_coalesced(self, command):
+        """Render thread: run a coalesced command, letting the next update queue it again."""
+        with self.coalesce_lock:
+            self.coalesced_commands.discard(command)
+        command()
+
+    def render_loop(self):
+        """
+        Body of the render thread: run queued commands as they arrive and draw
+        the active pattern whenever its next frame is due.
+        """
+        while True:
+            if not self.is_animating():
+                timeout = None
+            else:
+                timeout = self.clock.remaining()
+                if timeout <= 0:
+                    if not self.run_pending_commands():
+                        return
+                    try:
+                        self.render_frame()
+                    except Exception as e:
+                        # Drop the animation that failed rather than retrying it every frame
+                        self.render_errors += 1
+                        print(f"Error rendering frame: {e}")
+                        self.pattern_renderer = None
+                        self.brightness_fade = None
+                        self.color_fade = None
+                    continue
+            try:
+                command, args = self.commands.get(timeout=timeout)
+            except queue.Empty:
+                continue
+            if command is None:
+                return
+            self.run_command(command, args)
+
+    def run_pending_commands(self):
+        """
+        Run every command already queued, without waiting for more.
+
+        Returns:
+            bool: False if a shutdown was requested, True otherwise.
+        """
+        while True:
+            try:
+                command, args = self.commands.get_nowait()
+            except queue.Empty:
+                return True
+            if command is None:
+                return False
+            self.run_command(command, args)
+
+    def run_command(self, command, args):
+        """Render thread: run one queued command, logging a failure instead of stopping the thread."""
+        try:
+            command(*args)
+        except Exception as e:
+            self.render_errors += 1
+            print(f"Error running LED command {getattr(command, '__name__', command)}: {e}")
+
+    def is_animating(self):
+        """Render thread: whether anything needs a new frame at the next deadline."""
+        return self.pattern_renderer is not None or self.brightness_fade is not None or self.color_fade is not None
+
+    def render_frame(self):
+        """Render thread: advance any fades and the active pattern by one frame."""
+        now = time.monotonic()
+        if self.brightness_fade is not None:
+            self.strip_brightness = self.brightness_fade.value_at(now)[0]
+            if self.brightness_fade.done(now):
+                self.brightness_fade = None
+        if self.color_fade is not None:
+            self.solid_color = pack_color(*self.color_fade.value_at(now))
+            self.frame.fill(self.solid_color)
+            if self.color_fade.done(now):
+                self.color_fade = None
+        if self.pattern_renderer is not None:
+            self.pattern_renderer(self.pattern_step)
+        self.write_strip()
+        self.pattern_step += self.clock.tick()
+
+    def start_pattern(self, renderer, period=None, variant=0):
+        """
+        Render thread: switch to a new pattern, with its first frame due now.
+        Periodic patterns replay from the pattern cache when there is one;
+        `variant` distinguishes cycles of the same renderer, such as its colour.
+        """
+        if renderer is not None and period is not None and self.pattern_cache is not None:
+            self.cycle_renderer = renderer
+            self.cycle_period = period
+            self.cycle_variant = variant
+            self.cycle = None
+            renderer = self.render_cached_cycle
+        self.pattern_renderer = renderer
+        self.pattern_step = 0
+        self.clock.start()
+
+    def render_cached_cycle(self, step):
+        if self.cycle is None or self.cycle_version != self.palette.version:
+            key = (self.cycle_renderer.__name__, self.frame.num_pixels, f"{self.palette.fingerprint:08x}", f"{self.cycle_variant:06x}")
+            self.cycle = self.pattern_cache.get_cycle(key, self.cycle_period, self.frame, self.cycle_renderer)
+            self.cycle_version = self.palette.version
+        self.frame.load(self.cycle.frame(step))
+
+    def start_fade(self, attribute, start, end, duration, easing):
+        """Render thread: start a fade, replacing any in-flight fade of the same kind."""
+        if not self.is_animating():
+            self.clock.start()
+        setattr(self, attribute, Transition(start, end, duration, easing, time.monotonic()))
 
     def stop_current_pattern(self):
         """
-        Stop the currently running pattern by resetting the current_pattern
-        and waiting for the thread to exit.
+        Stop the currently running pattern. The render thread stops drawing it
+        at the next frame boundary.
         """
         self.current_pattern = None
-        if self.pattern_thread and self.pattern_thread.is_alive():
-            self.pattern_thread.join()
-        self.pattern_thread = None
+        self.post(self.start_pattern, None)
+
+    def shutdown(self):
+        """
+        Clear the strip and stop the render thread, waiting for both to finish.
+        """
+        self.clear_strip()
+        self.commands.put((None, ()))
+        self.render_thread.join()
 
     def clear_strip(self):
         self.last_change_time = None
         self.stop_current_pattern()
-        for i in range(self.strip.numPixels()):
-            self.strip.setPixelColor(i, Color(0, 0, 0))
-        self.strip.show()
+        self.post(self.show_solid_color, 0)
         print("LEDs cleared.")
 
     def set_max_brightness(self, delta):
-        self.max_brightness = max(0, min(255, self.max_brightness + delta))
-        self.strip.setBrightness(self.max_brightness)
-        self.strip.show()
+        max_brightness = max(0, min(255, self.max_brightness + delta))
+        if max_brightness != self.max_brightness:
+            self.max_brightness = max_brightness
+            self.post_coalesced(self.show_max_brightness)
         self.update_last_change_time()  # Update last change time
 
     def adjust_brightness(self, delta):
-        self.brightness = max(0, min(self.max_brightness, self.brightness + delta))
-        self.strip.setBrightness(self.brightness)
-        self.strip.show()
+        brightness = max(0, min(self.max_brightness, self.brightness + delta))
+        if brightness != self.brightness:
+            self.brightness = brightness
+            self.post(self.show_brightness, self.brightness)
+        if self.brightness == 0:
+            self.last_change_time = None
+        else:
+            self.update_last_change_time()  # Update last change time
+
+    def fade_brightness(self, target, duration=1.0, easing="ease_in_out"):
+        """
+        Fade to a new brightness on the render thread and return immediately.
+        A new fade replaces one that is still in progress, starting from
+        wherever that one had reached.
+
+        Args:
+            target (int): The target brightness, clamped to the maximum brightness.
+            duration (float): The length of the fade in seconds.
+            easing (str): The name of an easing curve in transitions.EASINGS.
+
+        Raises:
+            ValueError: If the easing curve is unknown or the duration is negative.
+        """
+        check_transition(duration, easing)  # Before any state changes, and off the render thread
+        target = max(0, min(self.max_brightness, target))
+        if target == self.brightness:
+            return
+        self.brightness = target
+        self.post(self.start_brightness_fade, target, duration, easing)
         if self.brightness == 0:
-            self.last_change_time = None 
+            self.last_change_time = None
         else:
             self.update_last_change_time()  # Update last change time
 
+    def start_brightness_fade(self, target, duration, easing):
+        self.start_fade("brightness_fade", (self.strip_brightness,), (target,), duration, easing)
+
+    def show_max_brightness(self):
+        """Render thread: apply the latest maximum brightness."""
+        self.show_brightness(self.max_brightness)
+
+    def show_brightness(self, brightness):
+        """
+        Render thread: apply a global brightness and latch it. While animating,
+        the next frame writes it, so the strip is written at most once a frame.
+        """
+        self.brightness_fade = None
+        self.strip_brightness = brightness
+        if not self.is_animating():
+            self.write_strip()
+
+    def write_strip(self):
+        """
+        Render thread: push the frame and brightness to the strip, skipping the
+        hardware write when neither changed since the last one.
+        """
+        if self.strip_brightness == self.shown_brightness and self.frame.pixels == self.shown_pixels:
+            self.skipped_writes += 1
+            return
+        if self.strip_brightness != self.shown_brightness:
+            self.strip.setBrightness(self.strip_brightness)
+            self.shown_brightness = self.strip_brightness
+        self.frame.push(self.strip, self.shown_pixels)  # Only pixels that changed are written
+        if self.shown_pixels is None:
+            self.shown_pixels = array('I', self.frame.pixels)
+        else:
+            self.shown_pixels[:] = self.frame.pixels
+        self.hardware_writes += 1
+
     def adjust_speed(self, delta):
         self.speed = max(1, self.speed + delta)
+        self.post_coalesced(self.apply_speed)
         self.update_last_change_time()  # Update last change time
 
+    def apply_speed(self):
+        """Render thread: pace frames at the latest speed."""
+        self.clock.set_frame_rate(1000.0 / self.speed)
+
     def activate_static_color(self):
         self.clear_strip()
         self.current_pattern = "static_color"
@@ -67,7 +350,7 @@ class RGBController:
     def activate_rainbow(self):
         self.clear_strip()
         self.current_pattern = "rainbow"
-        threading.Thread(target=self.rainbow, daemon=True).start()
+        self.post(self.start_pattern, self.render_rainbow, 256)
         self.update_last_change_time()  # Update last change time
         print("Rainbow pattern activated.")
 
@@ -75,12 +358,30 @@ class RGBController:
         self.clear_strip()
         self.current_pattern = "theater_chase"
         colors, color_names = self.get_color_options()
-        threading.Thread(
-            target=self.theater_chase, args=(colors[self.current_color_index],), daemon=True
-        ).start()
+        self.post(self.start_theater_chase, colors[self.current_color_index])
         self.update_last_change_time()  # Update last change time
         print(f"Theater Chase pattern activated with color: {color_names[self.current_color_index]}.")
 
+    def activate_pattern(self, name, renderer):
+        """
+        Activate a custom pattern.
+
+        Args:
+            name (str): The pattern name reported in current_pattern.
+            renderer (function): Called on the render thread with the animation
+                step for every frame; it draws into self.frame.
+        """
+        self.clear_strip()
+        self.current_pattern = name
+        self.post(self.start_pattern, renderer)
+        self.update_last_change_time()  # Update last change time
+        print(f"Pattern activated: {name}.")
+
+    def start_theater_chase(self, color):
+        """Render thread: start the theater chase pattern in the given colour."""
+        self.chase_color = color
+        self.start_pattern(self.render_theater_chase, 3, color)
+
     def cycle_next_color(self):
         colors, color_names = self.get_color_options()
         self.current_color_index = (self.current_color_index + 1) % len(colors)
@@ -96,61 +397,95 @@ class RGBController:
         print(f"Color changed to {color_names[self.current_color_index]}.")
 
     def color_wipe(self, color):
-        for i in range(self.strip.numPixels()):
-            self.strip.setPixelColor(i, color)
-        self.strip.show()
-
-    def rainbow(self):
-        while self.current_pattern == "rainbow":
-            for j in range(256):
-                if self.current_pattern != "rainbow":  # Check if the pattern has changed
-                    break
-                for i in range(self.strip.numPixels()):
-                    if self.current_pattern != "rainbow":  # Check again inside the inner loop
-                        break
-                    self.strip.setPixelColor(i, self.wheel((i + j) & 255))
-                self.strip.show()
-                time.sleep(self.speed / 1000.0)
-            if self.current_pattern != "rainbow":  # Exit the outer loop if the pattern changes
-                break
-
-    def theater_chase(self, color):
-        while self.current_pattern == "theater_chase":
-            for q in range(3):
-                if self.current_pattern != "theater_chase":  # Check if the pattern has changed
-                    break
-                for i in range(0, self.strip.numPixels(), 3):
-                    if self.current_pattern != "theater_chase":  # Check again inside the inner loop
-                        break
-                    self.strip.setPixelColor(i + q, color)
-                self.strip.show()
-                time.sleep(self.speed / 1000.0)
-                for i in range(0, self.strip.numPixels(), 3):
-                    if self.current_pattern != "theater_chase":  # Check again inside the cleanup loop
-                        break
-                    self.strip.setPixelColor(i + q, 0)
-            if self.current_pattern != "theater_chase":  # Exit the outer loop if the pattern changes
-                break
+        self.post(self.show_solid_color, color)
+
+    def show_solid_color(self, color):
+        """Render thread: fill the whole strip with one colour and latch it."""
+        self.color_fade = None
+        self.solid_color = color
+        self.frame.fill(color)
+        self.write_strip()
+
+    def fade_to_color(self, color, duration=1.0, easing="ease_in_out"):
+        """
+        Stop any pattern and fade the whole strip to a solid colour on the
+        render thread, returning immediately.
+
+        Args:
+            color (int): The packed target colour.
+            duration (float): The length of the fade in seconds.
+            easing (str): The name of an easing curve in transitions.EASINGS.
+
+        Raises:
+            ValueError: If the easing curve is unknown or the duration is negative.
+        """
+        check_transition(duration, easing)
+        self.current_pattern = "static_color"
+        self.post(self.start_pattern, None)
+        self.post(self.start_color_fade, color, duration, easing)
+        self.update_last_change_time()  # Update last change time
+
+    def start_color_fade(self, color, duration, easing):
+        self.start_fade("color_fade", unpack_color(self.solid_color), unpack_color(color), duration, easing)
+
+    def render_rainbow(self, step):
+        # Every rainbow frame is a window into one precomputed row of wheel colours
+        if self.rainbow_row_version != self.palette.version:
+            self.rainbow_row = self.palette.wheel_row(self.frame.num_pixels)
+            self.rainbow_row_version = self.palette.version
+        self.frame.blit(self.rainbow_row, step % 256)
+
+    def render_theater_chase(self, step):
+        self.frame.clear()
+        self.frame.fill_every(self.chase_color, 3, step % 3)
 
     def wheel(self, pos):
-        if pos < 85:
-            return Color(pos * 3, 255 - pos * 3, 0)
-        elif pos < 170:
-            pos -= 85
-            return Color(255 - pos * 3, 0, pos * 3)
-        else:
-            pos -= 170
-            return Color(0, pos * 3, 255 - pos * 3)
+        return self.palette.wheel[pos & 255]
 
     def get_color_options(self):
-        colors = [
-            Color(255, 255, 255),  # White
-            Color(255, 0, 0),  # Red
-            Color(0, 255, 0),  # Green
-            Color(0, 0, 255),  # Blue
-            Color(255, 255, 0),  # Yellow
-            Color(0, 255, 255),  # Cyan
-            Color(255, 0, 255),  # Magenta
-        ]
-        color_names = ["White", "Red", "Green", "Blue", "Yellow", "Cyan", "Magenta"]
-        return colors, color_names
\ No newline at end of file
+        return self.palette.colors, self.palette.names
+
+    def set_palette(self, named_colors=None, gamma=None, brightness=255):
+        """
+        Switch to a different palette at runtime, rebuilding the shared colour
+        tables in place on the render thread.
+
+        Args:
+            named_colors (list): (name, (red, green, blue)) pairs, or None to keep the current colours.
+            gamma (float or tuple): Gamma exponent(s), or None for linear output.
+            brightness (int): Scale applied on top of gamma (0-255).
+        """
+        self.post(self.load_palette, named_colors, gamma, brightness)
+        self.update_last_change_time()  # Update last change time
+
+    def load_palette(self, named_colors, gamma, brightness):
+        """Render thread: rebuild the palette and redraw a static colour with it."""
+        self.palette.load(named_colors, gamma, brightness)
+        self.current_color_index %= len(self.palette.colors)
+        if self.current_pattern == "static_color":
+            self.show_solid_color(self.palette.colors[self.current_color_index])
+
+    def get_animation_stats(self):
+        """
+        Report the achieved frame rate, jitter and dropped frames of the running
+        pattern, and how many commands and frames failed on the render thread.
+
+        Returns:
+            dict: The animation clock statistics.
+        """
+        return dict(self.clock.get_stats(), render_errors=self.render_errors)
+
+    def get_write_stats(self):
+        """
+        Report how many strip writes were pushed to the hardware, how many
+        were skipped because nothing had changed, and how many brightness or
+        speed updates were merged into one already queued.
+
+        Returns:
+            dict: The write counters.
+        """
+        return {
+            "hardware_writes": self.hardware_writes,
+            "skipped_writes": self.skipped_writes,
+            "coalesced_inputs": self.coalesced_inputs,
+        }
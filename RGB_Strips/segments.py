@@ -0,0 +1,174 @@
+from array import array
+from functools import partial
+from RGB_Strips.palette import pack_color, unpack_color
+
+SEGMENT_PATTERNS = ("off", "static_color", "rainbow", "theater_chase")
+
+# GPIOs that rpi_ws281x drives through the PWM peripheral (channel 0: 12/18, channel 1: 13/19)
+PWM_PINS = (12, 13, 18, 19)
+
+def scale_color(color, brightness):
+    """
+    Scale a packed colour by a brightness level.
+
+    Args:
+        color (int): The packed colour value.
+        brightness (int): The brightness to scale to (0-255).
+
+    Returns:
+        int: The scaled, packed colour value.
+    """
+    red, green, blue = unpack_color(color)
+    return pack_color(red * brightness // 255, green * brightness // 255, blue * brightness // 255)
+
+class Segment:
+    """
+    A run of consecutive pixels on one physical strip with its own pattern,
+    colour and brightness.
+
+    Every frame of the segment's pattern is a window into one precomputed row,
+    so drawing a frame is a single slice copy into the strip's frame buffer.
+    """
+
+    def __init__(self, name, strip_index, start, length, pattern="static_color", color=0xFFFFFF, brightness=255):
+        """
+        Initialize the segment.
+
+        Args:
+            name (str): The segment name.
+            strip_index (int): Index of the physical strip the segment is on.
+            start (int): Index of the segment's first pixel on that strip.
+            length (int): The number of pixels in the segment.
+            pattern (str): One of SEGMENT_PATTERNS.
+            color (int): The packed colour for static_color and theater_chase.
+            brightness (int): The segment brightness (0-255).
+        """
+        self.name = name
+        self.strip_index = strip_index
+        self.start = start
+        self.length = length
+        self.pattern = None
+        self.color = color
+        self.brightness = brightness
+        self.configure(pattern)
+
+    def configure(self, pattern=None, color=None, brightness=None):
+        """
+        Change the segment's pattern, colour or brightness. Arguments left as
+        None keep their current value.
+        """
+        if pattern is not None:
+            if pattern not in SEGMENT_PATTERNS:
+                raise ValueError(f"Unknown segment pattern: {pattern}")
+            self.pattern = pattern
+        if color is not None:
+            self.color = color
+        if brightness is not None:
+            self.brightness = max(0, min(255, brightness))
+        self.palette_version = None  # Rebuild the row before the next frame
+
+    def rebuild(self, palette):
+        """
+        Precompute the row that every frame of the pattern is windowed from.
+
+        Args:
+            palette (Palette): The palette to take wheel colours from.
+        """
+        length = self.length
+        if self.pattern == "rainbow":
+            self.row = array('I', (scale_color(color, self.brightness) for color in palette.wheel_row(length)))
+            self.period, self.stride = 256, 1
+        elif self.pattern == "theater_chase":
+            lit = array('I', [scale_color(self.color, self.brightness)])
+            self.row = array('I')
+            for q in range(3):
+                phase = array('I', [0]) * length
+                phase[q::3] = lit * len(range(q, length, 3))
+                self.row.extend(phase)
+            self.period, self.stride = 3, length
+        else:
+            color = scale_color(self.color, self.brightness) if self.pattern == "static_color" else 0
+            self.row = array('I', [color]) * length
+            self.period, self.stride = 1, 0
+        self.palette_version = palette.version
+
+    def render(self, pixels, step):
+        """
+        Copy the segment's frame for an animation step into a strip's pixels.
+
+        Args:
+            pixels (array): The packed pixels of the strip's frame buffer.
+            step (int): The animation step.
+        """
+        offset = (step % self.period) * self.stride
+        pixels[self.start:self.start + self.length] = self.row[offset:offset + self.length]
+
+class ZoneController:
+    """
+    Splits one or more physical strips, each driven by its own RGBController,
+    into named segments. On every tick each strip composites all of its
+    segments into a single frame, so render cost follows the total pixel count.
+
+    Each RGBController owns a separate PixelStrip and so a separate ws2811_t.
+    rpi_ws281x can only run both PWM channels from one ws2811_t, so at most
+    one strip may sit on a PWM pin (12, 13, 18 or 19). Put any other strip on
+    PCM (GPIO21) or SPI (GPIO10), each with its own DMA channel.
+    """
+
+    def __init__(self, controllers):
+        """
+        Initialize the zone controller.
+
+        Args:
+            controllers (list): One RGBController per physical strip.
+
+        Raises:
+            ValueError: If more than one ws281x strip is on a PWM pin.
+        """
+        self.controllers = list(controllers)
+        pwm_pins = [controller.led_pin for controller in self.controllers
+                    if controller.backend == "ws281x" and controller.led_pin in PWM_PINS]
+        if len(pwm_pins) > 1:
+            raise ValueError(f"Strips on GPIOs {pwm_pins} would share the PWM peripheral from separate ws2811_t "
+                             "instances; drive the other strips from PCM (GPIO21) or SPI (GPIO10)")
+        self.segments = {}
+        self.strip_segments = [[] for _ in self.controllers]  # Only touched by each strip's render thread
+
+    def add_segment(self, name, strip_index, start, length, pattern="static_color", color=0xFFFFFF, brightness=255):
+        """
+        Add a segment to one of the strips.
+
+        Returns:
+            Segment: The new segment.
+        """
+        num_pixels = self.controllers[strip_index].frame.num_pixels
+        if start < 0 or length < 1 or start + length > num_pixels:
+            raise ValueError(f"Segment {name} does not fit on strip {strip_index} ({num_pixels} pixels)")
+        segment = Segment(name, strip_index, start, length, pattern, color, brightness)
+        self.segments[name] = segment
+        self.controllers[strip_index].post(self.strip_segments[strip_index].append, segment)
+        return segment
+
+    def set_segment_pattern(self, name, pattern, color=None):
+        if pattern not in SEGMENT_PATTERNS:
+            raise ValueError(f"Unknown segment pattern: {pattern}")
+        segment = self.segments[name]
+        self.controllers[segment.strip_index].post(segment.configure, pattern, color)
+
+    def set_segment_brightness(self, name, brightness):
+        segment = self.segments[name]
+        self.controllers[segment.strip_index].post(segment.configure, None, None, brightness)
+
+    def activate(self):
+        """Switch every strip over to drawing its segments."""
+        for strip_index, controller in enumerate(self.controllers):
+            controller.activate_pattern("segments", partial(self.render_strip, strip_index))
+
+    def render_strip(self, strip_index, step):
+        """Render thread of one strip: composite its segments into the strip's frame."""
+        controller = self.controllers[strip_index]
+        pixels = controller.frame.pixels
+        for segment in self.strip_segments[strip_index]:
+            if segment.palette_version != controller.palette.version:
+                segment.rebuild(controller.palette)
+            segment.render(pixels, step)
@@ -0,0 +1,73 @@
+def linear(t):
+    return t
+
+def ease_in(t):
+    return t * t
+
+def ease_out(t):
+    return t * (2.0 - t)
+
+def ease_in_out(t):
+    return t * t * (3.0 - 2.0 * t)
+
+EASINGS = {
+    "linear": linear,
+    "ease_in": ease_in,
+    "ease_out": ease_out,
+    "ease_in_out": ease_in_out,
+}
+
+def check_transition(duration, easing):
+    """
+    Check transition arguments, so callers can reject them before queueing
+    a transition for another thread.
+
+    Raises:
+        ValueError: If the easing curve is unknown or the duration is negative.
+    """
+    if easing not in EASINGS:
+        raise ValueError(f"Unknown easing curve: {easing}")
+    if duration < 0:
+        raise ValueError(f"Transition duration must not be negative: {duration}")
+
+class Transition:
+    """
+    A timed interpolation between two sets of integer values, such as a
+    brightness level or the channels of a colour.
+    """
+
+    def __init__(self, start, end, duration, easing="linear", start_time=0.0):
+        """
+        Initialize the transition.
+
+        Args:
+            start (tuple): The starting values.
+            end (tuple): The target values.
+            duration (float): The length of the transition in seconds.
+            easing (str): The name of an easing curve in EASINGS.
+            start_time (float): The monotonic time the transition starts at.
+        """
+        check_transition(duration, easing)
+        self.start = start
+        self.end = end
+        self.duration = duration
+        self.easing = EASINGS[easing]
+        self.start_time = start_time
+
+    def done(self, now):
+        return now - self.start_time >= self.duration
+
+    def value_at(self, now):
+        """
+        Interpolate the values at a point in time.
+
+        Args:
+            now (float): The current monotonic time.
+
+        Returns:
+            tuple: The interpolated values, rounded to integers.
+        """
+        if self.done(now):
+            return self.end
+        progress = self.easing((now - self.start_time) / self.duration)
+        return tuple(int(a + (b - a) * progress + 0.5) for a, b in zip(self.start, self.end))
@@ -0,0 +1,92 @@
+import time
+from array import array
+from collections import deque
+
+def Color(red, green, blue, white=0):
+    """
+    Pack colour channels the same way as rpi_ws281x.Color, for use off-device.
+
+    Returns:
+        int: The packed colour value.
+    """
+    return (white << 24) | (red << 16) | (green << 8) | blue
+
+class VirtualPixelStrip:
+    """
+    A drop-in stand-in for rpi_ws281x.PixelStrip that needs no hardware.
+
+    Every show() records the pushed frame, its brightness and a timestamp
+    in a fixed-size ring buffer so renders can be inspected and timed.
+    """
+
+    def __init__(self, num, pin=18, freq_hz=800000, dma=10, invert=False, brightness=255, channel=0, capture_frames=256):
+        """
+        Initialize the virtual strip. The arguments match PixelStrip; the
+        hardware ones are accepted and ignored.
+
+        Args:
+            num (int): The number of pixels.
+            brightness (int): The initial brightness (0-255).
+            capture_frames (int): How many of the most recent frames to keep; 0 disables capture.
+        """
+        self.pixels = array('I', [0]) * num
+        self.brightness = brightness
+        self.channel = channel
+        self.captured_frames = deque(maxlen=capture_frames)
+        self.show_count = 0
+
+    def begin(self):
+        pass
+
+    def numPixels(self):
+        return len(self.pixels)
+
+    def setPixelColor(self, n, color):
+        if 0 <= n < len(self.pixels):
+            self.pixels[n] = color
+
+    def setPixelColorRGB(self, n, red, green, blue, white=0):
+        self.setPixelColor(n, Color(red, green, blue, white))
+
+    def getPixelColor(self, n):
+        return self.pixels[n]
+
+    def getPixels(self):
+        return self.pixels
+
+    def setBrightness(self, brightness):
+        self.brightness = brightness
+
+    def getBrightness(self):
+        return self.brightness
+
+    def __len__(self):
+        return len(self.pixels)
+
+    def __getitem__(self, pos):
+        return self.pixels[pos]
+
+    def __setitem__(self, pos, value):
+        # Same as PixelStrip: one packed colour per call, and a slice sets every
+        # pixel in it to that one colour rather than copying a sequence
+        if not isinstance(value, int):
+            raise TypeError(f"in method 'ws2811_led_set', argument 3 of type 'ws2811_led_t', got {type(value).__name__}")
+        if isinstance(pos, slice):
+            for n in range(*pos.indices(len(self.pixels))):
+                self.pixels[n] = value
+        else:
+            self.pixels[pos] = value
+
+    def show(self):
+        """Latch the current pixels and record them in the capture buffer."""
+        self.show_count += 1
+        if self.captured_frames.maxlen:
+            self.captured_frames.append((time.monotonic(), self.brightness, array('I', self.pixels)))
+
+    def get_captured_frames(self):
+        """
+        Returns:
+            list: (monotonic timestamp, brightness, packed pixels) for the most
+                recently shown frames, oldest first.
+        """
+        return list(self.captured_frames)
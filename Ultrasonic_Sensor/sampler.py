@@ -0,0 +1,177 @@
+import threading
+import time
+from array import array
+
+class SampleRing:
+    """
+    A fixed-size ring buffer of timestamped samples, preallocated so adding a
+    sample never allocates.
+    """
+
+    def __init__(self, size):
+        """
+        Args:
+            size (int): The number of samples to keep.
+        """
+        self.size = size
+        self.times = array('d', [0.0]) * size
+        self.values = array('d', [0.0]) * size
+        self.index = 0  # Slot the next sample goes into
+        self.count = 0
+
+    def append(self, timestamp, value):
+        self.times[self.index] = timestamp
+        self.values[self.index] = value
+        self.index = (self.index + 1) % self.size
+        self.count = min(self.count + 1, self.size)
+
+    def last(self, n):
+        """
+        Returns:
+            list: The values of the most recent `n` samples (or fewer), oldest first.
+        """
+        n = min(n, self.count)
+        return [self.values[(self.index - n + i) % self.size] for i in range(n)]
+
+    def samples(self):
+        """
+        Returns:
+            list: Every stored (timestamp, value) pair, oldest first.
+        """
+        start = self.index - self.count
+        return [(self.times[(start + i) % self.size], self.values[(start + i) % self.size]) for i in range(self.count)]
+
+class DistanceSampler:
+    """
+    Reads an HCSR04 at a fixed rate on its own thread and publishes a filtered
+    distance that consumers can read at any time without touching the sensor.
+
+    Each raw sample goes into a ring buffer. The estimate is the median of the
+    last few samples, exponentially smoothed, and a sample that jumps away from
+    the estimate while the median stays put is rejected as a spike.
+
+    With min_rate_hz and max_rate_hz set, the sampling rate adapts: it jumps to
+    the maximum while the distance is changing, then backs off to rate_hz while
+    steady, and down to the minimum while steady and closed.
+    """
+
+    def __init__(self, sensor, rate_hz=10.0, buffer_size=64, median_window=5, smoothing=0.3, outlier_threshold=30.0,
+                 min_rate_hz=None, max_rate_hz=None, change_threshold=2.0, closed_distance=5.0, slowdown=0.8):
+        """
+        Initialize the sampler.
+
+        Args:
+            sensor (HCSR04): The sensor to read.
+            rate_hz (float): Readings per second.
+            buffer_size (int): The number of raw samples kept in the ring buffer.
+            median_window (int): The number of recent samples the median is taken over.
+            smoothing (float): Weight of each new median in the exponential average (0-1).
+            outlier_threshold (float): Jump in cm from the estimate that counts as a spike.
+            min_rate_hz (float): Slowest rate while steady and closed, or None to sample at a fixed rate.
+            max_rate_hz (float): Fastest rate while the distance is changing, or None to sample at a fixed rate.
+            change_threshold (float): Distance in cm between a sample and the estimate that counts as changing.
+            closed_distance (float): Distance in cm at or below which the trunk counts as closed.
+            slowdown (float): Factor the rate is multiplied by for each steady sample (0-1).
+        """
+        self.sensor = sensor
+        self.rate_hz = rate_hz
+        self.current_rate_hz = rate_hz
+        self.min_rate_hz = min_rate_hz
+        self.max_rate_hz = max_rate_hz
+        self.change_threshold = change_threshold
+        self.closed_distance = closed_distance
+        self.slowdown = slowdown
+        self.ring = SampleRing(buffer_size)
+        self.median_window = median_window
+        self.smoothing = smoothing
+        self.outlier_threshold = outlier_threshold
+        self.filtered = None
+        self.latest = None  # (timestamp, raw distance, filtered distance), replaced as a whole
+        self.samples_taken = 0
+        self.errors = 0
+        self.rejected = 0
+        self.running = False
+        self.thread = None
+
+    def start(self):
+        """Start sampling on a background thread."""
+        self.running = True
+        self.thread = threading.Thread(target=self.run, daemon=True)
+        self.thread.start()
+
+    def stop(self):
+        """Stop sampling and wait for the thread to exit."""
+        self.running = False
+        if self.thread is not None:
+            self.thread.join()
+            self.thread = None
+
+    def run(self):
+        next_deadline = time.monotonic()
+        while self.running:
+            try:
+                distance = self.sensor.get_distance()
+            except RuntimeError:
+                self.errors += 1
+            else:
+                self.add_sample(time.monotonic(), distance)
+            next_deadline += 1.0 / self.current_rate_hz
+            delay = next_deadline - time.monotonic()
+            if delay > 0:
+                time.sleep(delay)
+            else:
+                next_deadline = time.monotonic()  # Fell behind; don't try to catch up
+
+    def add_sample(self, timestamp, distance):
+        """
+        Record a raw sample and update the filtered estimate.
+
+        Args:
+            timestamp (float): The monotonic time of the reading.
+            distance (float): The raw distance in cm.
+        """
+        self.ring.append(timestamp, distance)
+        self.samples_taken += 1
+        previous = self.filtered
+        recent = sorted(self.ring.last(self.median_window))
+        median = recent[len(recent) // 2]
+
+        if self.filtered is None:
+            self.filtered = median
+        elif abs(distance - self.filtered) > self.outlier_threshold and abs(median - self.filtered) <= self.outlier_threshold:
+            self.rejected += 1  # A lone spike; the median says the distance has not really moved
+        else:
+            self.filtered += (median - self.filtered) * self.smoothing
+        self.latest = (timestamp, distance, round(self.filtered, 2))
+        if self.min_rate_hz is not None and self.max_rate_hz is not None and previous is not None:
+            # React to the raw reading so a real move speeds sampling up before the median catches on
+            self.adapt_rate(abs(distance - previous) > self.change_threshold)
+
+    def adapt_rate(self, changing):
+        """
+        Pick the sampling rate for the next reading.
+
+        Args:
+            changing (bool): Whether the last sample moved noticeably away from the estimate.
+        """
+        if changing:
+            self.current_rate_hz = self.max_rate_hz
+            return
+        floor = self.min_rate_hz if self.filtered <= self.closed_distance else min(self.rate_hz, self.current_rate_hz)
+        self.current_rate_hz = max(floor, self.current_rate_hz * self.slowdown)
+
+    def get_filtered_distance(self):
+        """
+        Returns:
+            float: The latest filtered distance in cm, or None before the first reading.
+        """
+        latest = self.latest
+        return None if latest is None else latest[2]
+
+    def get_stats(self):
+        return {
+            "samples": self.samples_taken,
+            "errors": self.errors,
+            "rejected": self.rejected,
+            "rate_hz": round(self.current_rate_hz, 2),
+        }
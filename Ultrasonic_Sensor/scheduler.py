@@ -0,0 +1,125 @@
+import threading
+import time
+from Ultrasonic_Sensor.sampler import DistanceSampler
+from Ultrasonic_Sensor.ultrasonic import HCSR04, SETTLE_TIME
+
+class SensorScheduler:
+    """
+    Runs several HCSR04 sensors from one thread.
+
+    Sensors fire one at a time in a fixed round-robin, each in its own time
+    slot, so one sensor's ping is never heard as another's echo. Every sensor
+    gets its own sample stream: a DistanceSampler holding a ring buffer of
+    timestamped samples and a filtered estimate.
+    """
+
+    def __init__(self, sensor_pins, pi=None, slot_time=0.06, timeout=0.03, **sampler_options):
+        """
+        Set up every sensor and settle them all together.
+
+        Args:
+            sensor_pins (dict): Sensor name -> (trigger_pin, echo_pin).
+            pi (pigpio.pi): A connected pigpio instance for callback timing, or None to poll.
+            slot_time (float): Seconds reserved for each ping, long enough for its echoes to die out.
+            timeout (float): Seconds to wait for an echo before counting it as missed.
+            **sampler_options: Filtering options passed to each sensor's DistanceSampler.
+        """
+        self.slot_time = slot_time
+        self.sensors = {}
+        self.samplers = {}
+        self.misses = {}
+        for name, (trigger_pin, echo_pin) in sensor_pins.items():
+            sensor = HCSR04(trigger_pin, echo_pin, pi=pi, timeout=timeout, settle=False)
+            self.sensors[name] = sensor
+            self.samplers[name] = DistanceSampler(sensor, **sampler_options)
+            self.misses[name] = 0
+        self.listeners = []
+        time.sleep(SETTLE_TIME)  # One settle for all sensors instead of one each
+        self.running = False
+        self.thread = None
+        self.start_time = None
+
+    def start(self):
+        """Start pinging the sensors on a background thread."""
+        self.running = True
+        self.start_time = time.monotonic()
+        self.thread = threading.Thread(target=self.run, daemon=True)
+        self.thread.start()
+
+    def stop(self):
+        """Stop pinging and wait for the thread to exit."""
+        self.running = False
+        if self.thread is not None:
+            self.thread.join()
+            self.thread = None
+
+    def subscribe(self, callback):
+        """
+        Register a function called as callback(name, timestamp, raw, filtered) for every sample.
+        """
+        self.listeners.append(callback)
+
+    def run(self):
+        next_slot = time.monotonic()
+        while self.running:
+            for name, sensor in self.sensors.items():
+                if not self.running:
+                    return
+                try:
+                    distance = sensor.get_distance()
+                except RuntimeError:
+                    self.misses[name] += 1
+                else:
+                    sampler = self.samplers[name]
+                    sampler.add_sample(time.monotonic(), distance)
+                    timestamp, raw, filtered = sampler.latest
+                    for callback in self.listeners:
+                        callback(name, timestamp, raw, filtered)
+
+                # Hold the next ping until this slot is over
+                next_slot += self.slot_time
+                delay = next_slot - time.monotonic()
+                if delay > 0:
+                    time.sleep(delay)
+                else:
+                    next_slot = time.monotonic()
+
+    def get_filtered_distance(self, name):
+        """
+        Returns:
+            float: The latest filtered distance of one sensor in cm, or None before its first reading.
+        """
+        return self.samplers[name].get_filtered_distance()
+
+    def get_samples(self, name):
+        """
+        Returns:
+            list: The (timestamp, raw distance) samples buffered for one sensor, oldest first.
+        """
+        return self.samplers[name].ring.samples()
+
+    def get_stats(self):
+        """
+        Report per-sensor counts and the readings per second across all sensors.
+
+        Returns:
+            dict: The scheduler statistics.
+        """
+        per_sensor = {
+            name: {"samples": sampler.samples_taken, "misses": self.misses[name], "rejected": sampler.rejected}
+            for name, sampler in self.samplers.items()
+        }
+        total = sum(stats["samples"] for stats in per_sensor.values())
+        elapsed = time.monotonic() - self.start_time if self.start_time is not None else 0.0
+        return {
+            "sensors": per_sensor,
+            "samples": total,
+            "misses": sum(self.misses.values()),
+            "samples_per_second": round(total / elapsed, 2) if elapsed > 0 else 0.0,
+        }
+
+    def cleanup(self):
+        """Stop pinging and release every sensor's pins."""
+        self.stop()
+        for sensor in self.sensors.values():
+            sensor.cleanup()
@@ -0,0 +1,59 @@
+import random
+import time
+
+# (seconds, distance in cm at the end of the step): closed, opening, open, closing
+DEFAULT_PROFILE = [(10, 3.0), (3, 80.0), (20, 80.0), (3, 3.0)]
+
+class SimulatedHCSR04:
+    """
+    A stand-in for HCSR04 that needs no hardware. Distances follow a
+    repeating profile of linear ramps between waypoints, with a little noise,
+    so the trunk opens and closes on a schedule off-device.
+    """
+
+    def __init__(self, profile=None, noise=0.5, seed=None):
+        """
+        Initialize the simulated sensor.
+
+        Args:
+            profile (list): (seconds, distance in cm) steps; each ramps linearly from the
+                previous step's distance to its own. Repeats once it ends.
+            noise (float): Largest random error in cm added to each reading.
+            seed (int): Seed for the noise, for reproducible runs.
+        """
+        self.profile = profile or DEFAULT_PROFILE
+        self.cycle = sum(seconds for seconds, _ in self.profile)
+        self.noise = noise
+        self.rng = random.Random(seed)
+        self.start_time = time.monotonic()
+        self.missed_echoes = 0
+
+    def distance_at(self, elapsed):
+        """
+        Args:
+            elapsed (float): Seconds since the sensor was created.
+
+        Returns:
+            float: The noiseless profile distance in cm.
+        """
+        t = elapsed % self.cycle
+        previous = self.profile[-1][1]
+        for seconds, distance in self.profile:
+            if t < seconds:
+                return previous + (distance - previous) * t / seconds
+            t -= seconds
+            previous = distance
+        return previous
+
+    def get_distance(self):
+        """
+        Take a reading.
+
+        Returns:
+            float: The distance in cm.
+        """
+        distance = self.distance_at(time.monotonic() - self.start_time)
+        return round(max(0.0, distance + self.rng.uniform(-self.noise, self.noise)), 2)
+
+    def cleanup(self):
+        pass
@@ -0,0 +1,207 @@
+import heapq
+import itertools
+import threading
+import time
+
+CLOSED = "closed"
+OPEN = "open"
+LEFT_OPEN = "left_open"
+
+class TimerQueue:
+    """
+    One thread running callbacks at scheduled times, kept in a heap so only the
+    earliest deadline is ever waited on.
+    """
+
+    def __init__(self):
+        self.heap = []
+        self.counter = itertools.count()  # Breaks ties between equal deadlines
+        self.condition = threading.Condition()
+        self.thread = threading.Thread(target=self.run, daemon=True)
+        self.thread.start()
+
+    def schedule(self, delay, callback):
+        """
+        Run a callback on the timer thread after a delay.
+
+        Args:
+            delay (float): Seconds from now.
+            callback (function): Called with no arguments.
+
+        Returns:
+            list: A handle that can be passed to `reschedule` or `cancel`.
+        """
+        deadline = time.monotonic() + delay
+        timer = [deadline, next(self.counter), callback, deadline]  # Heap key, tie-break, callback, due time
+        with self.condition:
+            heapq.heappush(self.heap, timer)
+            self.condition.notify()
+        return timer
+
+    def reschedule(self, timer, delay):
+        """
+        Move a scheduled callback to `delay` seconds from now, reusing its heap
+        entry. A later due time is applied when the old one comes up, so
+        postponing a timer over and over never grows the heap.
+
+        Args:
+            timer (list): A handle from `schedule`, or None.
+            delay (float): Seconds from now.
+
+        Returns:
+            bool: False if the timer already ran or was cancelled; schedule a new one instead.
+        """
+        with self.condition:
+            if timer is None or timer[2] is None:
+                return False
+            timer[3] = time.monotonic() + delay
+            if timer[3] < timer[0]:
+                timer[0] = timer[3]
+                heapq.heapify(self.heap)
+                self.condition.notify()
+            return True
+
+    def cancel(self, timer):
+        """Stop a scheduled callback from running. Cancelled entries are dropped lazily."""
+        if timer is not None:
+            with self.condition:
+                timer[2] = None
+
+    def run(self):
+        while True:
+            with self.condition:
+                while not self.heap or self.heap[0][0] > time.monotonic():
+                    timeout = self.heap[0][0] - time.monotonic() if self.heap else None
+                    self.condition.wait(timeout)
+                timer = heapq.heappop(self.heap)
+                if timer[3] > timer[0]:
+                    # Postponed since it was queued; put it back at its new due time
+                    timer[0] = timer[3]
+                    heapq.heappush(self.heap, timer)
+                    continue
+                callback, timer[2] = timer[2], None
+            if callback is not None:
+                callback()
+
+class BrightnessCurve:
+    """
+    A precomputed distance -> brightness lookup with one entry per centimetre.
+    """
+
+    def __init__(self, off_distance=5, ramp_start=10, full_distance=100, exponent=1.0):
+        """
+        Build the lookup table.
+
+        Args:
+            off_distance (float): At or below this distance in cm the lights are off.
+            ramp_start (float): Distance in cm where the ramp starts from zero.
+            full_distance (float): At or above this distance in cm the lights are at full brightness.
+            exponent (float): Shape of the ramp; 1 is linear, larger values start slower.
+        """
+        self.full_distance = int(full_distance)
+        self.levels = bytearray(self.full_distance + 1)
+        for distance in range(self.full_distance + 1):
+            if distance <= off_distance:
+                level = 0
+            else:
+                fraction = max(0.0, min(1.0, (distance - ramp_start) / (full_distance - ramp_start)))
+                level = int(fraction ** exponent * 255)
+            self.levels[distance] = level
+
+    def lookup(self, distance, max_brightness):
+        """
+        Args:
+            distance (float): The distance in cm.
+            max_brightness (int): The brightness at full distance.
+
+        Returns:
+            int: The target brightness.
+        """
+        index = min(self.full_distance, max(0, int(distance)))
+        return self.levels[index] * max_brightness // 255
+
+class TrunkStateMachine:
+    """
+    Turns distance samples into debounced open/closed events with hysteresis,
+    plus a left_open event when the trunk stays open with no activity.
+
+    The left-open timeout is scheduled on a TimerQueue and postponed in place
+    on activity, rather than being checked on every sample.
+    """
+
+    def __init__(self, timers, closed_distance=5.0, open_distance=10.0, debounce_samples=3, left_open_timeout=300):
+        """
+        Initialize the state machine in the closed state.
+
+        Args:
+            timers (TimerQueue): Timer thread used for the left-open timeout.
+            closed_distance (float): At or below this distance in cm the trunk closes.
+            open_distance (float): At or above this distance in cm the trunk opens.
+            debounce_samples (int): Consecutive samples needed to change state.
+            left_open_timeout (float): Seconds open without activity before left_open fires.
+        """
+        self.timers = timers
+        self.closed_distance = closed_distance
+        self.open_distance = open_distance
+        self.debounce_samples = debounce_samples
+        self.left_open_timeout = left_open_timeout
+        self.state = CLOSED
+        self.pending = 0  # Consecutive samples pointing at the other state
+        self.left_open_timer = None
+        self.listeners = []
+        self.lock = threading.Lock()
+
+    def subscribe(self, callback):
+        """Register a function called as callback(event) for open, closed and left_open events."""
+        self.listeners.append(callback)
+
+    def emit(self, event):
+        for callback in self.listeners:
+            callback(event)
+
+    def update(self, distance):
+        """
+        Feed in a distance sample.
+
+        Args:
+            distance (float): The distance in cm.
+        """
+        with self.lock:
+            if self.state == CLOSED:
+                crossing = distance >= self.open_distance
+            else:
+                crossing = distance <= self.closed_distance
+            self.pending = self.pending + 1 if crossing else 0
+            if self.pending < self.debounce_samples:
+                return
+            self.pending = 0
+            self.state = CLOSED if self.state != CLOSED else OPEN
+            event = self.state
+            self.timers.cancel(self.left_open_timer)
+            self.left_open_timer = None
+            if self.state == OPEN:
+                self.schedule_left_open()
+        self.emit(event)
+
+    def note_activity(self):
+        """Restart the left-open timeout, for example after a remote button press."""
+        with self.lock:
+            if self.state == CLOSED:
+                return
+            self.state = OPEN
+            # Activity can arrive at 10 Hz; move the pending timeout rather than queueing another
+            if not self.timers.reschedule(self.left_open_timer, self.left_open_timeout):
+                self.schedule_left_open()
+
+    def schedule_left_open(self):
+        """Start the left-open timeout. Called with the lock held."""
+        timer = self.timers.schedule(self.left_open_timeout, lambda: self.on_left_open(timer))
+        self.left_open_timer = timer
+
+    def on_left_open(self, timer):
+        with self.lock:
+            if timer is not self.left_open_timer or self.state != OPEN:
+                return  # Superseded by a newer timeout
+            self.state = LEFT_OPEN
+            self.left_open_timer = None
+        self.emit(LEFT_OPEN)
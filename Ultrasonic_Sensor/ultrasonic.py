@@ -1,51 +1,162 @@
-import RPi.GPIO as GPIO
+try:
+    import RPi.GPIO as GPIO
+except (ImportError, RuntimeError):  # Not on a Pi; only pigpio timing is available
+    GPIO = None
+import pigpio
+import threading
 import time
 
+SPEED_OF_SOUND_HALF = 17150  # Half the speed of sound in cm/s, for the out-and-back echo
+SETTLE_TIME = 2  # Seconds the sensor needs with the trigger low before its first reading
+
 class HCSR04:
-    def __init__(self, trigger_pin, echo_pin):
+    def __init__(self, trigger_pin, echo_pin, pi=None, timeout=0.03, settle=True):
+        """
+        Initialize the sensor.
+
+        Args:
+            trigger_pin (int): The BCM GPIO pin wired to the trigger.
+            echo_pin (int): The BCM GPIO pin wired to the echo.
+            pi (pigpio.pi): A connected pigpio instance. When given, echoes are
+                timed by edge callbacks with hardware tick timestamps instead of
+                busy-wait polling.
+            timeout (float): Seconds to wait for an echo before counting it as missed.
+            settle (bool): Whether to wait SETTLE_TIME before returning. Pass False
+                when the caller settles several sensors together.
+        """
         self.trigger_pin = trigger_pin
         self.echo_pin = echo_pin
-        
-        GPIO.setmode(GPIO.BCM)
-        GPIO.setup(self.trigger_pin, GPIO.OUT)
-        GPIO.setup(self.echo_pin, GPIO.IN)
-        
-        GPIO.output(self.trigger_pin, GPIO.LOW)
-        time.sleep(2)
-    
+        self.pi = pi
+        self.timeout = timeout
+        self.missed_echoes = 0
+
+        if pi is None:
+            if GPIO is None:
+                raise RuntimeError("RPi.GPIO is not available; pass a pigpio instance to time echoes with pigpio.")
+            GPIO.setmode(GPIO.BCM)
+            GPIO.setup(self.trigger_pin, GPIO.OUT)
+            GPIO.setup(self.echo_pin, GPIO.IN)
+            GPIO.output(self.trigger_pin, GPIO.LOW)
+        else:
+            self.echo_received = threading.Event()
+            self.rise_tick = None
+            self.trigger_time = None
+            self.distance = None
+            pi.set_mode(self.trigger_pin, pigpio.OUTPUT)
+            pi.set_mode(self.echo_pin, pigpio.INPUT)
+            pi.write(self.trigger_pin, 0)
+            self.cb = pi.callback(self.echo_pin, pigpio.EITHER_EDGE, self.echo_callback)
+        if settle:
+            time.sleep(SETTLE_TIME)
+
     def get_distance(self):
+        """
+        Take a reading, waiting at most `timeout` for the echo.
+
+        Returns:
+            float: The distance in cm.
+
+        Raises:
+            RuntimeError: If no echo arrived in time.
+        """
+        if self.pi is not None:
+            self.trigger()
+            if not self.echo_received.wait(self.timeout):
+                self.missed_echoes += 1
+                self.trigger_time = None
+                raise RuntimeError("No echo received from the ultrasonic sensor")
+            return self.distance
+
         # Send a 10us pulse to trigger the sensor
         GPIO.output(self.trigger_pin, GPIO.HIGH)
         time.sleep(0.00001)
         GPIO.output(self.trigger_pin, GPIO.LOW)
-        
+
         # Wait for the echo to start
+        deadline = time.time() + self.timeout
+        pulse_start = time.time()
         while GPIO.input(self.echo_pin) == 0:
             pulse_start = time.time()
-        
+            if pulse_start > deadline:
+                self.missed_echoes += 1
+                raise RuntimeError("No echo received from the ultrasonic sensor")
+
         # Wait for the echo to end
+        pulse_end = time.time()
         while GPIO.input(self.echo_pin) == 1:
             pulse_end = time.time()
-        
+            if pulse_end > deadline:
+                self.missed_echoes += 1
+                raise RuntimeError("Echo from the ultrasonic sensor did not end")
+
         # Calculate the duration of the pulse
         pulse_duration = pulse_end - pulse_start
-        
+
         # Calculate the distance (speed of sound is 34300 cm/s)
-        distance = pulse_duration * 17150
+        distance = pulse_duration * SPEED_OF_SOUND_HALF
         distance = round(distance, 2)
-        
+
         return distance
-    
+
+    def trigger(self):
+        """
+        Start a reading without waiting for it (pigpio mode only). Collect the
+        result with `read_distance`.
+        """
+        self.rise_tick = None
+        self.echo_received.clear()
+        self.trigger_time = time.monotonic()
+        self.pi.gpio_trigger(self.trigger_pin, 10, 1)
+
+    def read_distance(self):
+        """
+        Collect the result of the last `trigger` without blocking (pigpio mode only).
+
+        Returns:
+            float: The distance in cm, or None if the echo is still pending or was missed.
+        """
+        if self.echo_received.is_set():
+            self.trigger_time = None
+            return self.distance
+        if self.trigger_time is not None and time.monotonic() - self.trigger_time > self.timeout:
+            self.missed_echoes += 1
+            self.trigger_time = None
+        return None
+
+    def echo_callback(self, gpio, level, tick):
+        """
+        pigpio callback timing the echo pulse from its rising and falling edges.
+
+        Args:
+            gpio (int): The GPIO pin number.
+            level (int): The GPIO level (0 or 1).
+            tick (int): The time of the event in microseconds.
+        """
+        if level == 1:
+            self.rise_tick = tick
+        elif level == 0 and self.rise_tick is not None:
+            pulse_us = pigpio.tickDiff(self.rise_tick, tick)
+            self.rise_tick = None
+            self.distance = round(pulse_us * SPEED_OF_SOUND_HALF / 1000000.0, 2)
+            self.echo_received.set()
+
     def cleanup(self):
-        GPIO.cleanup()
+        if self.pi is not None:
+            self.cb.cancel()
+            self.pi.write(self.trigger_pin, 0)
+        else:
+            GPIO.cleanup((self.trigger_pin, self.echo_pin))  # Leave other users of GPIO alone
 
 # Example usage:
 if __name__ == "__main__":
     sensor = HCSR04(trigger_pin=23, echo_pin=24)
     try:
         while True:
-            distance = sensor.get_distance()
-            print(f"Distance: {distance} cm")
+            try:
+                distance = sensor.get_distance()
+                print(f"Distance: {distance} cm")
+            except RuntimeError as e:
+                print(f"Error reading distance: {e}")
             time.sleep(1)
     except KeyboardInterrupt:
         print("Measurement stopped by user")
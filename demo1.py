@@ -26,7 +26,7 @@ def main():
     """
     Main function to create an IRRemote instance and start reading IR codes.
     """
-    ir_remote = IRRemote(pin=17, ir_code_file="/home/pi/PiLite/config/ir_code_ff.txt", private_key=secret_key)
+    ir_remote = IRRemote(pin=17, ir_code_file="/home/pi/PiLite/config/ir_code_ff.jsonl", private_key=secret_key)
     if not ir_remote.pi.connected:
         print("Failed to connect to pigpiod. Exiting.")
         sys.exit(1)
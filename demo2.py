@@ -2,34 +2,86 @@
 from RGB_Strips.rgb_controller import RGBController
 from IR.remote import IRRemote
 from Ultrasonic_Sensor.ultrasonic import HCSR04
+from Ultrasonic_Sensor.simulated import SimulatedHCSR04
+from IR.trace import ReplayPi
+from Ultrasonic_Sensor.sampler import DistanceSampler
+from Ultrasonic_Sensor.trunk_state import TimerQueue, TrunkStateMachine, BrightnessCurve, CLOSED, LEFT_OPEN
 import time
 import signal
 import sys
 from startup import create_and_activate_venv, start_pigpiod, load_environment_variables, cleanup
 from Mobile_Notifications.pushsafer import PushsaferNotification  # Import PushsaferNotification class
+from Mobile_Notifications.dispatcher import NotificationDispatcher
 import os  # Import os for system commands
 
-# Create and activate virtual environment
-venv_path = "/home/pi/PiLite/venv"
-create_and_activate_venv(venv_path)
-
-# Start pigpiod if not already running
-start_pigpiod()
-
 # Load environment variables
 secret_key = load_environment_variables()
 
+# With LED_BACKEND=virtual the demo runs on any Linux box: no venv or pigpiod
+# setup, a simulated LED strip, an IR receiver fed by IR.trace.ReplayPi and a
+# simulated distance sensor
+off_device = os.getenv("LED_BACKEND") == "virtual"
+
+if not off_device:
+    # Create and activate virtual environment
+    venv_path = "/home/pi/PiLite/venv"
+    create_and_activate_venv(venv_path)
+
+    # Start pigpiod if not already running
+    start_pigpiod()
+
 # Create a single instance of RGBController
 controller = RGBController()
 
 # Create an instance of IRRemote and pass the shared RGBController instance
-ir_remote = IRRemote(pin=17, ir_code_file="/home/pi/PiLite/config/ir_code_ff.txt", private_key=secret_key, controller=controller)
-
-# Create an instance of the ultrasonic sensor
-ultrasonic_sensor = HCSR04(trigger_pin=23, echo_pin=24)
+if off_device:
+    ir_code_file = os.path.join(os.path.dirname(os.path.abspath(__file__)), "config", "ir_code_ff.jsonl")
+    ir_remote = IRRemote(pin=17, ir_code_file=ir_code_file, private_key=secret_key, controller=controller, pi=ReplayPi())
+    ultrasonic_sensor = SimulatedHCSR04()
+else:
+    ir_remote = IRRemote(pin=17, ir_code_file="/home/pi/PiLite/config/ir_code_ff.jsonl", private_key=secret_key, controller=controller)
+    # Create an instance of the ultrasonic sensor, timed by pigpio edge callbacks
+    ultrasonic_sensor = HCSR04(trigger_pin=23, echo_pin=24, pi=ir_remote.pi)
+
+# Read the sensor on a background thread and publish a filtered distance,
+# sampling slowly while the trunk sits closed and quickly while it moves
+distance_sampler = DistanceSampler(ultrasonic_sensor, rate_hz=10, min_rate_hz=1, max_rate_hz=20)
 
 # Initialize PushsaferNotification with your private key
 pushsafer_notifier = PushsaferNotification(private_key=secret_key)  # Replace with your Pushsafer private key
+# Send notifications from a background thread, retrying while the network is down
+notifications = NotificationDispatcher(pushsafer_notifier)
+
+# Debounced trunk state with a 5 minute left-open timeout that any lighting change restarts
+timers = TimerQueue()
+trunk = TrunkStateMachine(timers, closed_distance=5, open_distance=10, left_open_timeout=300)
+controller.add_change_listener(trunk.note_activity)
+
+# Distance -> brightness: off at 5cm or less, ramping linearly from 10cm to full at 100cm
+brightness_curve = BrightnessCurve(off_distance=5, ramp_start=10, full_distance=100)
+
+def on_trunk_event(event):
+    """
+    Handle trunk state events.
+
+    Args:
+        event (str): "open", "closed" or "left_open".
+    """
+    print(f"Trunk {event}.")
+    if event == LEFT_OPEN:
+        # Send a notification using Pushsafer
+        notifications.send(
+            message="Trunk was left open.",
+            title="PiLite Alert",
+            icon="24",  # Example icon number
+            sound="10",  # Example sound number
+            vibration="1",  # Example vibration setting
+            picture=""  # Optional: Add a picture URL or leave empty
+        )
+        print("Trunk was left open. Sending notification...")
+        controller.clear_strip()
+
+trunk.subscribe(on_trunk_event)
 
 # Signal handler for graceful shutdown
 def signal_handler(sig, frame):
@@ -38,9 +90,16 @@ def signal_handler(sig, frame):
     Cleans up resources for both RGBController and IRRemote.
     """
     print("\nExiting... Cleaning up resources.")
-    controller.clear_strip()  # Clear the LEDs
+    ir_remote.dispatcher.stop()  # Finish queued key presses before the render thread stops
+    notifications.stop(timeout=5)  # Give queued notifications a last try without hanging shutdown
+    ir_remote.notifications.stop(timeout=5)
+    pushsafer_notifier.close()  # Close the kept-alive connections
+    ir_remote.notifier.close()
+    controller.shutdown()  # Clear the LEDs and stop the render thread
+    distance_sampler.stop()  # Stop reading the sensor before releasing it
     ultrasonic_sensor.cleanup()  # Cleanup GPIO for ultrasonic sensor
-    cleanup()  # Cleanup for pigpiod and other resources
+    if not off_device:
+        cleanup()  # Cleanup for pigpiod and other resources
     sys.exit(0)
 
 signal.signal(signal.SIGINT, signal_handler)
@@ -53,44 +112,32 @@ def main():
         print("Failed to connect to pigpiod. Exiting.")
         sys.exit(1)
 
+    distance_sampler.start()
+    last_sample_time = None
     try:
         while True:
-            try:
-                distance = ultrasonic_sensor.get_distance()
-
-                # Check for inactivity (10 minutes = 600 seconds)
-                if controller.last_change_time is not None and time.time() - controller.last_change_time > 300:
-
-                    # Send a notification using Pushsafer
-                    pushsafer_notifier.send_notification(
-                        message="Trunk was left open.",
-                        title="PiLite Alert",
-                        icon="24",  # Example icon number
-                        sound="10",  # Example sound number
-                        vibration="1",  # Example vibration setting
-                        picture=""  # Optional: Add a picture URL or leave empty
-                    )
-                    print("Trunk was left open. Sending notification...")
-
-                    controller.clear_strip()
-                    continue
-
-                # Adjust brightness dynamically based on distance
-                if distance <= 5:
-                    target_brightness = 0  # 0% of maximum brightness
-                elif distance >= 100:
-                    target_brightness = controller.max_brightness  # 100% of maximum brightness
-                else:
-                    # Scale brightness linearly between 10cm and 100cm
-                    target_brightness = int((distance - 10) / 90 * controller.max_brightness)
-
-                # Gradually adjust brightness to the target value
-                step = 1 if target_brightness > controller.brightness else -1
-                for brightness in range(controller.brightness, target_brightness, step):
-                    controller.adjust_brightness(step)
-                    time.sleep(0.01)
-            except RuntimeError as e:
-                print(f"Error reading distance: {e}")
+            # Latest filtered reading; never blocks on the sensor
+            latest = distance_sampler.latest
+            if latest is None or latest[0] == last_sample_time:
+                time.sleep(0.1)  # No new sample yet
+                continue
+            last_sample_time, _, distance = latest
+
+            trunk.update(distance)
+            if trunk.state == LEFT_OPEN:
+                # Leave the lights off until the trunk closes or the remote is used
+                time.sleep(0.1)
+                continue
+
+            # Adjust brightness dynamically based on distance
+            if trunk.state == CLOSED:
+                target_brightness = 0
+            else:
+                target_brightness = brightness_curve.lookup(distance, controller.max_brightness)
+
+            # Gradually fade to the target brightness (10 ms per step) on the render thread
+            duration = abs(target_brightness - controller.brightness) * 0.01
+            controller.fade_brightness(target_brightness, duration=duration, easing="linear")
             # Add a small delay to prevent excessive CPU usage
             time.sleep(0.1)
 